@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib
@@ -5,38 +6,54 @@ matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from meter_store import store_exists, list_meters, iter_meter_frames
+from profile_cache import load_hourly_matrix, load_daily_profiles, profile_time_series
+from hourly_sketch import HourlyStatsSketch
+from meter_matrix import load_meter_matrix
+from meter_grid import SLOTS_PER_DAY
+from heatmap import draw_heatmap
 import warnings
 warnings.filterwarnings('ignore')
 
-def load_and_analyze_data():
-    """Load the combined CSV data and analyze consumption patterns"""
+# Nighttime hours (9 PM to 4 AM)
+NIGHT_HOURS = list(range(21, 24)) + list(range(0, 5))  # 21, 22, 23, 0, 1, 2, 3, 4
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+
+def load_and_analyze_data(csv_filename='combined_load_profile_electrical.csv', chunk_size=100000):
+    """Stream every chunk of the combined CSV into hourly_stats/meter_stats.
+    
+    Each chunk is summarized into an HourlyStatsSketch and merged into the
+    running one, so memory scales with the number of meters rather than the
+    number of rows. Medians come from the sketch's quantile buckets and are
+    within 1% of the exact median reading.
+    """
     
     print("Loading combined load profile data...")
-    # Load data in chunks to manage memory
-    chunk_size = 100000
-    chunks = []
-    
-    for chunk in pd.read_csv('combined_load_profile_electrical.csv', chunksize=chunk_size):
-        # Convert datetime columns
-        chunk['Entry Datetime'] = pd.to_datetime(chunk['Entry Datetime'])
-        chunk['Meter Datetime'] = pd.to_datetime(chunk['Meter Datetime'])
-        
-        # Extract hour from meter datetime for analysis
-        chunk['Hour'] = chunk['Meter Datetime'].dt.hour
-        chunk['Date'] = chunk['Meter Datetime'].dt.date
-        
-        chunks.append(chunk)
+    
+    sketch = HourlyStatsSketch()
+    n_records = 0
+    first_reading, last_reading = None, None
+    
+    for chunk in pd.read_csv(csv_filename, usecols=['HES Meter Id', 'Meter Datetime', POWER_COL],
+                             chunksize=chunk_size):
+        meter_datetime = pd.to_datetime(chunk['Meter Datetime'])
+        part = HourlyStatsSketch.from_readings(chunk['HES Meter Id'], meter_datetime.dt.hour, chunk[POWER_COL])
+        sketch = sketch.merge(part)
         
-        if len(chunks) >= 5:  # Limit to first 500k records for initial analysis
-            break
+        n_records += len(chunk)
+        first_reading = meter_datetime.min() if first_reading is None else min(first_reading, meter_datetime.min())
+        last_reading = meter_datetime.max() if last_reading is None else max(last_reading, meter_datetime.max())
     
-    df = pd.concat(chunks, ignore_index=True)
+    hourly_stats = sketch.hourly_stats()
+    meter_stats = sketch.meter_stats()
     
-    print(f"Data loaded: {len(df):,} records")
-    print(f"Date range: {df['Meter Datetime'].min()} to {df['Meter Datetime'].max()}")
-    print(f"Unique meters: {df['HES Meter Id'].nunique()}")
+    print(f"Data loaded: {n_records:,} records")
+    print(f"Date range: {first_reading} to {last_reading}")
+    print(f"Unique meters: {len(meter_stats)}")
     
-    return df
+    return hourly_stats, meter_stats
 
 def analyze_hourly_patterns(df):
     """Analyze hourly consumption patterns for each meter"""
@@ -55,82 +72,140 @@ def analyze_hourly_patterns(df):
     
     return hourly_stats, meter_stats
 
-def identify_anomalous_meters(hourly_stats, meter_stats):
-    """Identify meters with anomalous nighttime consumption (9 PM - 4 AM)"""
+def hourly_mean_matrix(hourly_stats):
+    """Pivot hourly_stats into a meters x 24 matrix of hourly means (NaN where an hour has no readings)"""
     
-    print("\nIdentifying anomalous nighttime consumption patterns...")
-    
-    # Define nighttime hours (9 PM to 4 AM)
-    night_hours = list(range(21, 24)) + list(range(0, 5))  # 21, 22, 23, 0, 1, 2, 3, 4
+    meter_ids = hourly_stats['HES Meter Id'].unique()
+    matrix = hourly_stats.pivot(index='HES Meter Id', columns='Hour', values='mean')
+    matrix = matrix.reindex(index=meter_ids, columns=range(24))
     
-    # Calculate nighttime vs daytime consumption for each meter
-    anomalous_meters = []
+    return matrix
+
+def _row_sums(values):
+    """Sum each row left to right.
+    
+    ndarray.sum(axis=1) may change its summation order with the number of
+    rows, which would make a meter's metrics depend on which other meters
+    are scored alongside it. Accumulating column by column keeps every row's
+    result independent of the rest of the matrix.
+    """
+    
+    total = np.zeros(values.shape[0])
+    for col in range(values.shape[1]):
+        total = total + values[:, col]
+    return total
+
+def _row_nanmeans(values):
+    """Mean of the non-missing values of each row"""
     
-    for meter_id in hourly_stats['HES Meter Id'].unique():
-        meter_hourly = hourly_stats[hourly_stats['HES Meter Id'] == meter_id]
-        meter_overall = meter_stats[meter_stats['HES Meter Id'] == meter_id].iloc[0]
-        
-        # Get nighttime and daytime consumption
-        night_data = meter_hourly[meter_hourly['Hour'].isin(night_hours)]
-        day_data = meter_hourly[~meter_hourly['Hour'].isin(night_hours)]
-        
-        if len(night_data) == 0 or len(day_data) == 0:
-            continue
-        
-        # Calculate metrics
-        night_avg = night_data['mean'].mean()
-        day_avg = day_data['mean'].mean()
-        night_max = night_data['mean'].max()
-        day_max = day_data['mean'].max()
-        night_min = night_data['mean'].min()
-        overall_max = meter_overall['max']
-        overall_min = meter_overall['min']
-        overall_mean = meter_overall['mean']
-        
-        # Anomaly detection criteria
-        anomaly_score = 0
-        anomaly_reasons = []
-        
-        # 1. High nighttime consumption compared to peak
-        if night_max > 0.7 * overall_max:
-            anomaly_score += 3
-            anomaly_reasons.append(f"High night peak: {night_max:.0f}W vs overall max {overall_max:.0f}W")
-        
-        # 2. Nighttime consumption higher than daytime average
-        if night_avg > day_avg:
-            anomaly_score += 2
-            anomaly_reasons.append(f"Night avg ({night_avg:.0f}W) > Day avg ({day_avg:.0f}W)")
-        
-        # 3. High base consumption during night (doesn't dip close to minimum)
-        if night_min > 0.5 * overall_mean:
-            anomaly_score += 2
-            anomaly_reasons.append(f"High night minimum: {night_min:.0f}W vs overall mean {overall_mean:.0f}W")
-        
-        # 4. Check for increasing consumption during night hours
-        night_consumption_trend = night_data.sort_values('Hour')['mean'].values
-        if len(night_consumption_trend) > 2:
-            # Check if consumption is generally increasing during night
-            increasing_trend = np.polyfit(range(len(night_consumption_trend)), night_consumption_trend, 1)[0]
-            if increasing_trend > 10:  # Significant positive trend
-                anomaly_score += 1
-                anomaly_reasons.append(f"Increasing night trend: +{increasing_trend:.1f}W/hour")
-        
-        if anomaly_score >= 2:  # Threshold for anomalous behavior
-            anomalous_meters.append({
-                'meter_id': meter_id,
-                'anomaly_score': anomaly_score,
-                'night_avg': night_avg,
-                'day_avg': day_avg,
-                'night_max': night_max,
-                'night_min': night_min,
-                'overall_max': overall_max,
-                'overall_min': overall_min,
-                'overall_mean': overall_mean,
-                'reasons': anomaly_reasons
-            })
-    
-    # Sort by anomaly score
-    anomalous_meters = sorted(anomalous_meters, key=lambda x: x['anomaly_score'], reverse=True)
+    present = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _row_sums(np.where(present, values, 0.0)) / present.sum(axis=1)
+
+def night_trend_slopes(night_means):
+    """Least-squares slope of each row against the position of its non-missing values.
+    
+    Closed form of np.polyfit(range(n), values, 1)[0] applied row by row, where
+    n counts the hours present in that row. Rows with fewer than 2 values give NaN.
+    """
+    
+    present = ~np.isnan(night_means)
+    n = present.sum(axis=1)
+    x = np.where(present, np.cumsum(present, axis=1) - 1, 0).astype(float)
+    y = np.where(present, night_means, 0.0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = _row_sums(x) / n
+        y_mean = _row_sums(y) / n
+        dx = np.where(present, x - x_mean[:, None], 0.0)
+        dy = np.where(present, y - y_mean[:, None], 0.0)
+        slopes = _row_sums(dx * dy) / _row_sums(dx * dx)
+    
+    return slopes
+
+def score_anomalies(hourly_means, meter_stats):
+    """Apply the four nighttime anomaly criteria to every meter at once"""
+    
+    overall = meter_stats.set_index('HES Meter Id').reindex(hourly_means.index)
+    values = hourly_means.to_numpy(dtype=float)
+    
+    # Night hours in ascending order, matching the sort the trend is fitted on
+    night_cols = np.array(sorted(NIGHT_HOURS))
+    day_cols = np.setdiff1d(np.arange(24), night_cols)
+    night = values[:, night_cols]
+    day = values[:, day_cols]
+    
+    with np.errstate(invalid='ignore'):
+        scores = pd.DataFrame({
+            'meter_id': hourly_means.index,
+            'night_avg': _row_nanmeans(night),
+            'day_avg': _row_nanmeans(day),
+            'night_max': np.nanmax(night, axis=1),
+            'night_min': np.nanmin(night, axis=1),
+            'overall_max': overall['max'].to_numpy(),
+            'overall_min': overall['min'].to_numpy(),
+            'overall_mean': overall['mean'].to_numpy(),
+            'n_night': (~np.isnan(night)).sum(axis=1),
+            'n_day': (~np.isnan(day)).sum(axis=1),
+            'night_trend': night_trend_slopes(night),
+        })
+    
+    # 1. High nighttime consumption compared to peak
+    high_peak = (scores['night_max'] > 0.7 * scores['overall_max']).to_numpy()
+    # 2. Nighttime consumption higher than daytime average
+    night_over_day = (scores['night_avg'] > scores['day_avg']).to_numpy()
+    # 3. High base consumption during night (doesn't dip close to minimum)
+    high_base = (scores['night_min'] > 0.5 * scores['overall_mean']).to_numpy()
+    # 4. Significant positive trend across the night hours
+    rising = ((scores['n_night'] > 2) & (scores['night_trend'] > 10)).to_numpy()
+    
+    scores['anomaly_score'] = 3 * high_peak + 2 * night_over_day + 2 * high_base + 1 * rising
+    scores['high_peak'] = high_peak
+    scores['night_over_day'] = night_over_day
+    scores['high_base'] = high_base
+    scores['rising'] = rising
+    
+    # Meters without both night and day readings can't be judged
+    return scores[(scores['n_night'] > 0) & (scores['n_day'] > 0)].reset_index(drop=True)
+
+def anomaly_reasons(row):
+    """Human-readable reasons for one scored meter"""
+    
+    reasons = []
+    if row.high_peak:
+        reasons.append(f"High night peak: {row.night_max:.0f}W vs overall max {row.overall_max:.0f}W")
+    if row.night_over_day:
+        reasons.append(f"Night avg ({row.night_avg:.0f}W) > Day avg ({row.day_avg:.0f}W)")
+    if row.high_base:
+        reasons.append(f"High night minimum: {row.night_min:.0f}W vs overall mean {row.overall_mean:.0f}W")
+    if row.rising:
+        reasons.append(f"Increasing night trend: +{row.night_trend:.1f}W/hour")
+    return reasons
+
+def rank_anomalous_meters(hourly_stats, meter_stats):
+    """Score meters and return the anomalous ones, highest score first"""
+    
+    scores = score_anomalies(hourly_mean_matrix(hourly_stats), meter_stats)
+    flagged = scores[scores['anomaly_score'] >= 2]  # Threshold for anomalous behavior
+    
+    # Stable sort keeps meters with equal scores in their original order
+    flagged = flagged.iloc[np.argsort(-flagged['anomaly_score'].to_numpy(), kind='stable')]
+    
+    return [{
+        'meter_id': row.meter_id,
+        'anomaly_score': int(row.anomaly_score),
+        'night_avg': row.night_avg,
+        'day_avg': row.day_avg,
+        'night_max': row.night_max,
+        'night_min': row.night_min,
+        'overall_max': row.overall_max,
+        'overall_min': row.overall_min,
+        'overall_mean': row.overall_mean,
+        'reasons': anomaly_reasons(row)
+    } for row in flagged.itertuples(index=False)]
+
+def report_anomalous_meters(anomalous_meters):
+    """Print the number of anomalous meters and the top five"""
     
     print(f"Found {len(anomalous_meters)} meters with anomalous nighttime consumption")
     
@@ -140,11 +215,128 @@ def identify_anomalous_meters(hourly_stats, meter_stats):
         print(f"   Anomaly Score: {meter['anomaly_score']}")
         print(f"   Night avg: {meter['night_avg']:.0f}W, Day avg: {meter['day_avg']:.0f}W")
         print(f"   Reasons: {'; '.join(meter['reasons'])}")
+
+def identify_anomalous_meters(hourly_stats, meter_stats):
+    """Identify meters with anomalous nighttime consumption (9 PM - 4 AM)"""
+    
+    print("\nIdentifying anomalous nighttime consumption patterns...")
+    
+    anomalous_meters = rank_anomalous_meters(hourly_stats, meter_stats)
+    report_anomalous_meters(anomalous_meters)
     
     return anomalous_meters
 
-def plot_anomalous_consumption(df, anomalous_meters, top_n=3):
-    """Create plots for the most anomalous meters"""
+def analyze_meter_shard(meter_ids):
+    """Compute stats and anomaly scores for one shard of meters; runs inside a worker process.
+    
+    Readings are read from the store one meter at a time and every meter's
+    statistics depend only on its own readings, so the result for a meter is
+    the same whichever shard it lands in.
+    """
+    
+    sketches = []
+    for meter_id, readings in iter_meter_frames(meter_ids, columns=['HES Meter Id', 'Meter Datetime', POWER_COL]):
+        sketches.append(HourlyStatsSketch.from_readings(
+            readings['HES Meter Id'], readings['Meter Datetime'].dt.hour, readings[POWER_COL]))
+    
+    if not sketches:
+        return None
+    
+    sketch = HourlyStatsSketch.combine(sketches)
+    hourly_stats, meter_stats = sketch.hourly_stats(), sketch.meter_stats()
+    
+    return hourly_stats, meter_stats, rank_anomalous_meters(hourly_stats, meter_stats)
+
+def analyze_sharded(workers, shards_per_worker=4):
+    """Shard the store's meters across a process pool and merge the per-shard results"""
+    
+    meter_ids = list_meters()
+    n_shards = max(1, min(len(meter_ids), workers * shards_per_worker))
+    # Round-robin shards balance meters with long and short histories
+    shards = [meter_ids[i::n_shards] for i in range(n_shards)]
+    
+    print(f"Analyzing {len(meter_ids):,} meters in {n_shards} shards with {workers} workers...")
+    
+    if workers == 1:
+        results = list(map(analyze_meter_shard, shards))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(analyze_meter_shard, shards))
+    results = [result for result in results if result is not None]
+    
+    hourly_stats = pd.concat([r[0] for r in results]).sort_values(['HES Meter Id', 'Hour']).reset_index(drop=True)
+    meter_stats = pd.concat([r[1] for r in results]).sort_values('HES Meter Id').reset_index(drop=True)
+    
+    # Same order as the serial ranking: score descending, then meter id
+    anomalous_meters = [meter for r in results for meter in r[2]]
+    anomalous_meters.sort(key=lambda meter: (-meter['anomaly_score'], meter['meter_id']))
+    
+    print(f"Unique meters: {len(meter_stats)}")
+    print("\nIdentifying anomalous nighttime consumption patterns...")
+    report_anomalous_meters(anomalous_meters)
+    
+    return hourly_stats, meter_stats, anomalous_meters
+
+def matrix_shard_stats(rows):
+    """hourly_stats/meter_stats of a range of rows of the store's matrix; runs inside a worker process.
+    
+    Every worker maps the same file, so the readings are shared through the
+    page cache instead of being copied into each process. The slots with
+    readings go through the same HourlyStatsSketch as the reading paths, so
+    the report has the same columns (median and std included) and the same
+    values wherever a slot holds a single reading.
+    """
+    
+    grid = load_meter_matrix()
+    values = grid.values[rows]
+    meter_rows, slots = np.nonzero(~np.isnan(values))
+    
+    # Matrix rows start at midnight, two slots to the hour
+    sketch = HourlyStatsSketch.from_readings(grid.meter_ids[rows][meter_rows], slots % SLOTS_PER_DAY // 2,
+                                             values[meter_rows, slots])
+    return sketch.hourly_stats(), sketch.meter_stats()
+
+def analyze_matrix(workers=None, rows_per_shard=256):
+    """Score every meter of the store from its memory-mapped matrix, row ranges spread over processes"""
+    
+    n_meters = len(load_meter_matrix().meter_ids)
+    shards = [slice(start, min(start + rows_per_shard, n_meters)) for start in range(0, n_meters, rows_per_shard)]
+    
+    print(f"Analyzing {n_meters:,} meters from the store matrix in {len(shards)} shards...")
+    
+    if workers is None or workers == 1:
+        results = list(map(matrix_shard_stats, shards))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(matrix_shard_stats, shards))
+    
+    hourly_stats = pd.concat([r[0] for r in results], ignore_index=True)
+    meter_stats = pd.concat([r[1] for r in results], ignore_index=True)
+    print(f"Unique meters: {len(meter_stats)}")
+    
+    return hourly_stats, meter_stats, identify_anomalous_meters(hourly_stats, meter_stats)
+
+def load_hourly_means(meter_ids):
+    """Meters x 24 hourly mean power: from the store's matrix when there is a store, else the profile cache"""
+    
+    if not store_exists():
+        return load_hourly_matrix(meter_ids)
+    
+    grid = load_meter_matrix()
+    meter_ids = list(meter_ids)
+    found = [meter_id for meter_id in meter_ids if meter_id in grid]
+    rows = np.array([grid.row(meter_id) for meter_id in found], dtype=np.int64)
+    
+    # One fancy-indexed read of the wanted rows, then every meter's 24 means at once
+    block = grid.values[rows].reshape(len(rows), grid.n_days, 24, 2)
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        means = np.nanmean(block, axis=(1, 3), dtype=np.float64)
+    matrix = pd.DataFrame(means.reshape(len(rows), 24), index=found, columns=pd.RangeIndex(24, name='Hour'))
+    return matrix.reindex(meter_ids)
+
+def plot_anomalous_consumption(anomalous_meters, top_n=3):
+    """Create plots for the most anomalous meters from the cached profiles"""
     
     print(f"\nCreating plots for top {top_n} anomalous meters...")
     
@@ -157,18 +349,22 @@ def plot_anomalous_consumption(df, anomalous_meters, top_n=3):
     if top_n == 1:
         axes = axes.reshape(1, -1)
     
-    night_hours = list(range(21, 24)) + list(range(0, 5))
+    night_hours = NIGHT_HOURS
+    
+    top_ids = [meter['meter_id'] for meter in anomalous_meters[:top_n]]
+    hourly_matrix = load_hourly_means(top_ids)
+    daily_profiles = load_daily_profiles(top_ids)
     
     for i in range(min(top_n, len(anomalous_meters))):
         meter_id = anomalous_meters[i]['meter_id']
-        meter_data = df[df['HES Meter Id'] == meter_id].copy()
         
-        if len(meter_data) == 0:
+        if meter_id not in daily_profiles.index.get_level_values(0):
             continue
+        meter_data = profile_time_series(daily_profiles.loc[meter_id])
         
         # Plot 1: 24-hour average consumption pattern
         ax1 = axes[i, 0]
-        hourly_avg = meter_data.groupby('Hour')['Import active power (QI+QIV)[W]'].mean()
+        hourly_avg = hourly_matrix.loc[meter_id].dropna()
         
         # Color nighttime hours differently
         colors = ['red' if hour in night_hours else 'blue' for hour in hourly_avg.index]
@@ -213,78 +409,85 @@ def plot_anomalous_consumption(df, anomalous_meters, top_n=3):
     plt.close()
     
     # Create a summary heatmap
-    create_consumption_heatmap(df, anomalous_meters[:5])
+    create_consumption_heatmap(anomalous_meters[:5])
 
-def create_consumption_heatmap(df, anomalous_meters):
-    """Create a heatmap showing consumption patterns for anomalous meters"""
+def create_consumption_heatmap(anomalous_meters, filename='consumption_heatmap_anomalous_meters.png', dpi=300):
+    """Meters x hours heatmap of hourly mean power, drawn as one image whatever the number of meters"""
     
     print("Creating consumption heatmap...")
     
-    fig, ax = plt.subplots(figsize=(14, 8))
-    
-    # Prepare data for heatmap
-    heatmap_data = []
-    meter_labels = []
-    
-    for meter_info in anomalous_meters:
-        meter_id = meter_info['meter_id']
-        meter_data = df[df['HES Meter Id'] == meter_id]
-        
-        if len(meter_data) == 0:
-            continue
-        
-        # Calculate hourly averages
-        hourly_avg = meter_data.groupby('Hour')['Import active power (QI+QIV)[W]'].mean()
-        
-        # Ensure we have all 24 hours
-        full_hourly = pd.Series(index=range(24), dtype=float)
-        full_hourly.update(hourly_avg)
-        full_hourly = full_hourly.fillna(0)
-        
-        heatmap_data.append(full_hourly.values)
-        meter_labels.append(f"{meter_id[-8:]}")  # Last 8 chars for readability
+    # One row of hourly averages per meter, built in one pass
+    hourly_matrix = load_hourly_means([meter['meter_id'] for meter in anomalous_meters])
+    hourly_matrix = hourly_matrix[hourly_matrix.notna().any(axis=1)]
+    meter_labels = [f"{meter_id[-8:]}" for meter_id in hourly_matrix.index]  # Last 8 chars for readability
     
-    if heatmap_data:
-        heatmap_array = np.array(heatmap_data)
+    if len(hourly_matrix) > 0:
+        fig, ax = plt.subplots(figsize=(14, 8 if len(hourly_matrix) <= 40 else 12))
         
-        # Create heatmap
-        sns.heatmap(heatmap_array, 
-                   xticklabels=range(24),
-                   yticklabels=meter_labels,
-                   annot=False,
-                   fmt='.0f',
-                   cmap='YlOrRd',
-                   cbar_kws={'label': 'Power Consumption (W)'},
-                   ax=ax)
+        # Hours without readings show as missing cells
+        draw_heatmap(ax, hourly_matrix.to_numpy(), x_extent=(0, 24), row_labels=meter_labels,
+                     colorbar_label='Power Consumption (W)', dpi=dpi)
         
-        ax.set_title('Hourly Consumption Heatmap - Anomalous Meters')
+        ax.set_title(f'Hourly Consumption Heatmap - {len(hourly_matrix)} Anomalous Meters')
         ax.set_xlabel('Hour of Day')
-        ax.set_ylabel('Meter ID (last 8 digits)')
+        ax.set_ylabel('Meter ID (last 8 digits)' if len(hourly_matrix) <= 40 else 'Meters')
+        ax.set_xticks(np.arange(24) + 0.5)
+        ax.set_xticklabels(range(24))
         
         # Highlight nighttime hours
-        night_hours = list(range(21, 24)) + list(range(0, 5))
+        night_hours = NIGHT_HOURS
         for hour in night_hours:
             ax.axvline(x=hour+0.5, color='blue', linestyle='--', alpha=0.5, linewidth=1)
         
         plt.tight_layout()
-        plt.savefig('consumption_heatmap_anomalous_meters.png', dpi=300, bbox_inches='tight')
+        plt.savefig(filename, dpi=dpi, bbox_inches='tight')
         plt.close()
 
-def main():
-    """Main analysis function"""
+def create_fleet_heatmap(filename='consumption_heatmap_fleet.png', dpi=150):
+    """Every meter of the store over its whole time range, from the memory-mapped matrix.
     
-    # Load and analyze data
-    df = load_and_analyze_data()
+    The matrix is block-averaged down to the output resolution before it
+    is drawn, so a year of 30-minute slots for thousands of meters is one
+    image of at most a few million pixels.
+    """
     
-    # Analyze hourly patterns
-    hourly_stats, meter_stats = analyze_hourly_patterns(df)
+    print("Creating fleet consumption heatmap...")
     
-    # Identify anomalous meters
-    anomalous_meters = identify_anomalous_meters(hourly_stats, meter_stats)
+    grid = load_meter_matrix()
+    fig, ax = plt.subplots(figsize=(16, 10))
+    draw_heatmap(ax, grid.values, x_extent=(0, grid.n_days), colorbar_label='Power Consumption (W)', dpi=dpi)
+    
+    month_starts = grid.dates[grid.dates.is_month_start]
+    ax.set_xticks([(day - grid.start).days for day in month_starts])
+    ax.set_xticklabels([f'{day:%b %Y}' for day in month_starts], rotation=45)
+    ax.set_title(f'Consumption of {len(grid.meter_ids):,} Meters, 30-minute Slots')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Meters')
+    
+    plt.tight_layout()
+    plt.savefig(filename, dpi=dpi, bbox_inches='tight')
+    plt.close()
+    print(f"Fleet heatmap saved to: {filename}")
+
+def main(workers=None, matrix=False):
+    """Main analysis function"""
+    
+    if matrix:
+        # NumPy over the memory-mapped meters x slots matrix of the store
+        hourly_stats, meter_stats, anomalous_meters = analyze_matrix(workers)
+    elif workers is not None:
+        # Meter-sharded analysis of the partitioned store
+        hourly_stats, meter_stats, anomalous_meters = analyze_sharded(workers)
+    else:
+        # Stream the full dataset into hourly patterns
+        hourly_stats, meter_stats = load_and_analyze_data()
+        
+        # Identify anomalous meters
+        anomalous_meters = identify_anomalous_meters(hourly_stats, meter_stats)
     
     if anomalous_meters:
-        # Create plots
-        plot_anomalous_consumption(df, anomalous_meters, top_n=3)
+        # Create plots from the cached profiles
+        plot_anomalous_consumption(anomalous_meters, top_n=3)
         
         # Save results
         results_df = pd.DataFrame(anomalous_meters)
@@ -295,4 +498,16 @@ def main():
         print("No significantly anomalous meters found.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Identify meters with anomalous nighttime consumption')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Shard meters from the partitioned store across this many processes '
+                             '(1 runs the same sharded analysis serially)')
+    parser.add_argument('--matrix', action='store_true',
+                        help="Score from the store's memory-mapped meters x slots matrix")
+    parser.add_argument('--fleet-heatmap', action='store_true',
+                        help='Also draw every meter of the store over its whole time range')
+    args = parser.parse_args()
+    
+    main(args.workers, args.matrix)
+    if args.fleet_heatmap:
+        create_fleet_heatmap()
\ No newline at end of file
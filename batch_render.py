@@ -0,0 +1,123 @@
+import os
+import argparse
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from meter_store import load_meter_data
+from chart_templates import STYLES, DayChartTemplate
+import warnings
+warnings.filterwarnings('ignore')
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+
+# One template per style, created on first use in each worker process and reused for every chart
+_TEMPLATES = {}
+
+
+def render_chart(style, meter_id, target_date, day_data, output_dir='.'):
+    """Render one meter/day chart with the worker's template for the style"""
+
+    if style not in _TEMPLATES:
+        _TEMPLATES[style] = DayChartTemplate(style)
+    return _TEMPLATES[style].render(meter_id, target_date, day_data, output_dir)
+
+
+def render_chunk(tasks, styles, output_dir='.'):
+    """Render every style for a chunk of (meter_id, target_date, day_data) tasks; runs inside a worker"""
+
+    filenames = []
+    for meter_id, target_date, day_data in tasks:
+        for style in styles:
+            filenames.append(render_chart(style, meter_id, target_date, day_data, output_dir))
+    return filenames
+
+
+def load_day_frames(pairs=None, meter_ids=None, start=None, end=None):
+    """Load every requested meter/day with one read of the store.
+
+    Either give explicit (meter_id, date) pairs, or meter_ids with a
+    [start, end) date range to render every day that has readings.
+    Returns a list of (meter_id, 'YYYY-MM-DD', day_data) sorted by meter and date.
+    """
+
+    if pairs is not None:
+        pairs = pd.DataFrame(list(pairs), columns=['HES Meter Id', 'Date'])
+        pairs['Date'] = pd.to_datetime(pairs['Date']).dt.normalize()
+        meter_ids = sorted(pairs['HES Meter Id'].unique())
+        start = pairs['Date'].min()
+        end = pairs['Date'].max() + pd.Timedelta(days=1)
+
+    print(f'Loading readings for {len(meter_ids) if meter_ids is not None else "all"} meters...')
+    df = load_meter_data(meter_ids, start, end, columns=[POWER_COL])
+    df['Date'] = df['Meter Datetime'].dt.normalize()
+    df['Hour'] = df['Meter Datetime'].dt.hour
+
+    if pairs is not None:
+        wanted = pd.MultiIndex.from_frame(pairs[['HES Meter Id', 'Date']])
+        df = df[pd.MultiIndex.from_frame(df[['HES Meter Id', 'Date']]).isin(wanted)]
+
+    frames = []
+    for (meter_id, day), day_data in df.groupby(['HES Meter Id', 'Date'], sort=True):
+        frames.append((meter_id, day.strftime('%Y-%m-%d'), day_data.drop(columns='Date').reset_index(drop=True)))
+
+    if pairs is not None and len(frames) < len(pairs):
+        print(f'  No readings for {len(pairs) - len(frames)} of {len(pairs)} requested meter/days')
+
+    return frames
+
+
+def batch_render(frames, styles=tuple(STYLES), workers=None, output_dir='.', chunks_per_worker=4):
+    """Render all charts for the loaded meter/days in a process pool"""
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    n_workers = workers or os.cpu_count() or 1
+    n_chunks = max(1, min(len(frames), n_workers * chunks_per_worker))
+    chunks = [frames[i::n_chunks] for i in range(n_chunks)]
+
+    print(f'Rendering {len(frames) * len(styles)} charts ({", ".join(styles)}) with {n_workers} workers...')
+
+    filenames = []
+    if n_workers == 1:
+        for chunk in chunks:
+            filenames += render_chunk(chunk, styles, output_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(render_chunk, chunk, styles, output_dir) for chunk in chunks]
+            for future in futures:
+                filenames += future.result()
+
+    print(f'Saved {len(filenames)} charts to {output_dir}')
+
+    return filenames
+
+
+def read_pairs(filename):
+    """Meter/date pairs from a CSV with HES Meter Id and Date columns"""
+
+    pairs = pd.read_csv(filename, usecols=['HES Meter Id', 'Date'])
+    return list(pairs.itertuples(index=False, name=None))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render 24-hour consumption charts for many meter/day pairs')
+    parser.add_argument('--pairs', help='CSV of meter/day pairs with HES Meter Id and Date columns')
+    parser.add_argument('--meters', nargs='*', help='Render every day with readings for these meters')
+    parser.add_argument('--meters-from', help='CSV whose first column lists the meters, '
+                                              'e.g. anomalous_meters_analysis.csv')
+    parser.add_argument('--start', help='First date of the --meters range (inclusive)')
+    parser.add_argument('--end', help='Last date of the --meters range (inclusive)')
+    parser.add_argument('--styles', nargs='+', choices=list(STYLES), default=list(STYLES))
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--output-dir', default='.', help='Directory the charts are written to')
+    args = parser.parse_args()
+
+    if args.pairs:
+        frames = load_day_frames(pairs=read_pairs(args.pairs))
+    else:
+        meter_ids = list(args.meters or [])
+        if args.meters_from:
+            meter_ids += pd.read_csv(args.meters_from).iloc[:, 0].astype(str).tolist()
+        end = pd.Timestamp(args.end) + pd.Timedelta(days=1) if args.end else None
+        frames = load_day_frames(meter_ids=list(dict.fromkeys(meter_ids)) or None, start=args.start, end=end)
+
+    filenames = batch_render(frames, args.styles, args.workers, args.output_dir)
@@ -0,0 +1,82 @@
+import os
+import contextlib
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+import plot_24hour_consumption
+import plot_clean_24hour
+import plot_plotly_style
+
+# Chart style -> module providing FIGSIZE, SAVEFIG_KWARGS and output_filename,
+# the function drawing a chart from scratch and the one updating its data in place
+STYLES = {
+    '24hour': (plot_24hour_consumption, plot_24hour_consumption.draw_24hour_consumption,
+               plot_24hour_consumption.update_24hour_consumption),
+    'clean': (plot_clean_24hour, plot_clean_24hour.draw_clean_24hour_consumption,
+              plot_clean_24hour.update_clean_24hour_consumption),
+    'plotly': (plot_plotly_style, plot_plotly_style.draw_plotly_style_24hour,
+               plot_plotly_style.update_plotly_style_24hour),
+}
+
+
+def style_context(style):
+    """rc settings a style's figure is created and drawn under, scoped to that style only"""
+
+    if style == 'clean':
+        return sns.axes_style(plot_clean_24hour.STYLE_RC)
+    if style == 'plotly':
+        return plt.rc_context(plot_plotly_style.STYLE_RC)
+    return contextlib.nullcontext()
+
+
+class DayChartTemplate:
+    """A 24-hour chart drawn once and then re-pointed at other days.
+
+    The first day is drawn in full (styling, locators, spans, legend) and the
+    layout is computed once with tight_layout. Every later day only updates
+    the data artists (set_data, set_offsets, set_text). The charts only show
+    the time of day, so each day's readings are moved onto the first day's
+    time axis, which keeps the x limits, night spans and ticks valid.
+    """
+
+    def __init__(self, style):
+        self.style = style
+        self.module, self.draw, self.update = STYLES[style]
+        with style_context(style):
+            self.fig, self.ax = plt.subplots(figsize=self.module.FIGSIZE)
+        self.artists = None
+        self.anchor = None
+
+    def _on_anchor_day(self, day_data, target_date):
+        offset = self.anchor - pd.Timestamp(target_date).normalize()
+        if offset == pd.Timedelta(0):
+            return day_data
+        day_data = day_data.copy()
+        day_data['Meter Datetime'] = day_data['Meter Datetime'] + offset
+        return day_data
+
+    def _draw(self, day_data, meter_id, target_date):
+        self.ax.clear()
+        self.anchor = pd.Timestamp(target_date).normalize()
+        self.artists = self.draw(self.ax, day_data, meter_id, target_date)
+        self.fig.tight_layout()
+
+    def render(self, meter_id, target_date, day_data, output_dir='.'):
+        """Save one meter/day chart, updating the drawn artists whenever possible"""
+
+        with style_context(self.style):
+            if self.artists is None:
+                self._draw(day_data, meter_id, target_date)
+            elif not self.update(self.ax, self.artists, self._on_anchor_day(day_data, target_date),
+                                 meter_id, target_date):
+                self._draw(day_data, meter_id, target_date)
+
+            filename = os.path.join(output_dir, self.module.output_filename(meter_id, target_date))
+            self.fig.savefig(filename, **self.module.SAVEFIG_KWARGS)
+
+        return filename
+
+    def close(self):
+        plt.close(self.fig)
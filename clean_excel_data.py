@@ -1,96 +1,290 @@
+import os
+import shutil
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import load_workbook
+from hes_datetime import parse_hes_datetimes
+from meter_store import (STORE_DIR, append_to_store, compact_store, iter_meter_frames, merge_new_parts,
+                         load_manifest, save_manifest, file_manifest_entry, is_ingested, record_ingested,
+                         update_high_water)
+from day_index import build_day_index
+from meter_matrix import build_meter_matrix
+
+EXCEL_FILES = ['Readings_LoadProfileElectrical_V2 (1)_100.xlsx', 'Readings_LoadProfileElectrical_V2 (2)_100.xlsx']
+# Sorted by meter and Entry Datetime after a full export; incremental runs append unsorted
+CSV_FILENAME = 'combined_load_profile_electrical.csv'
+
+IMPORT_COL = 'Import active power (QI+QIV)[W]'
+EXPORT_COL = 'Export active power (QII+QIII)[W]'
+
+def clean_batch(df):
+    """Clean one batch of raw workbook rows, returning the batch and the number of invalid datetimes"""
 
-def clean_excel_file(filename):
-    print(f'Processing {filename}...')
-    
-    # Read the Excel file
-    df = pd.read_excel(filename)
-    
     # Clean column names (remove extra spaces and special characters)
     df.columns = df.columns.str.strip()
-    
-    # Convert datetime columns with specific format handling
-    for col in ['Entry Datetime', 'Meter Datetime']:
-        if col in df.columns:
-            # Vectorized string replacement for better performance
-            df[col] = df[col].astype(str)
-            # Replace the pattern to fix microseconds format
-            df[col] = df[col].str.replace(r':(\d{6})$', r'.\1', regex=True)
-            # Convert to datetime
-            df[col] = pd.to_datetime(df[col], format='%b %d, %Y, %H:%M:%S.%f', errors='coerce')
-    
+
+    # Parse both datetime columns in one pass; values they share are only parsed once
+    datetime_cols = [col for col in ['Entry Datetime', 'Meter Datetime'] if col in df.columns]
+    parsed, rejected = parse_hes_datetimes(*(df[col].to_numpy() for col in datetime_cols))
+    for col, values in zip(datetime_cols, parsed):
+        df[col] = values
+
     # Remove rows where datetime parsing failed
-    before_shape = df.shape[0]
-    df = df.dropna(subset=['Entry Datetime', 'Meter Datetime'])
-    after_shape = df.shape[0]
-    if before_shape != after_shape:
-        print(f'  Removed {before_shape - after_shape} rows with invalid datetime values')
-    
+    df = df[~rejected]
+    invalid_rows = int(rejected.sum())
+
     # Clean numeric columns
-    numeric_cols = ['Import active power (QI+QIV)[W]', 'Export active power (QII+QIII)[W]']
+    numeric_cols = [IMPORT_COL, EXPORT_COL]
     for col in numeric_cols:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
+            # Always float so part files written from different batches share one schema
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('float64')
+
+    return df, invalid_rows
+
+def clean_excel_file(filename):
+    print(f'Processing {filename}...')
+
+    # Read the Excel file
+    df = pd.read_excel(filename)
+
+    df, invalid_rows = clean_batch(df)
+    if invalid_rows:
+        print(f'  Removed {invalid_rows} rows with invalid datetime values')
+
     # Remove duplicates
     before_shape = df.shape[0]
     df = df.drop_duplicates()
     after_shape = df.shape[0]
     if before_shape != after_shape:
         print(f'  Removed {before_shape - after_shape} duplicate rows')
-    
+
     print(f'  Final shape: {df.shape}')
     print(f'  Date range: {df["Entry Datetime"].min()} to {df["Entry Datetime"].max()}')
     print(f'  Unique meters: {df["HES Meter Id"].nunique()}')
-    
+
     return df
 
-def combine_and_export():
-    # Process both files
-    excel_files = ['Readings_LoadProfileElectrical_V2 (1)_100.xlsx', 'Readings_LoadProfileElectrical_V2 (2)_100.xlsx']
-    cleaned_dfs = []
+def iter_excel_batches(filename, batch_size=50000):
+    """Yield the first worksheet of a workbook as DataFrames of at most batch_size rows"""
 
-    for file in excel_files:
-        df_clean = clean_excel_file(file)
-        cleaned_dfs.append(df_clean)
-        print()
+    # read_only mode streams rows from the sheet XML instead of building the whole workbook
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(name) for name in next(rows)]
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+def ingest_excel_file(filename, part_prefix, store_dir=STORE_DIR, batch_size=50000):
+    """Stream one workbook into the store batch by batch; runs inside a worker process"""
+
+    stats = {'file': filename, 'rows_read': 0, 'invalid_rows': 0, 'rows_written': 0,
+             'meters': set(), 'start': None, 'end': None, 'part_files': []}
+
+    for batch_index, batch in enumerate(iter_excel_batches(filename, batch_size)):
+        stats['rows_read'] += len(batch)
+
+        batch, invalid_rows = clean_batch(batch)
+        stats['invalid_rows'] += invalid_rows
+        batch = batch.drop_duplicates()
+        if len(batch) == 0:
+            continue
+
+        stats['part_files'] += append_to_store(batch, f'{part_prefix}-{batch_index:05d}', store_dir)
+
+        stats['rows_written'] += len(batch)
+        stats['meters'].update(batch['HES Meter Id'].unique())
+        batch_start, batch_end = batch['Entry Datetime'].min(), batch['Entry Datetime'].max()
+        stats['start'] = batch_start if stats['start'] is None else min(stats['start'], batch_start)
+        stats['end'] = batch_end if stats['end'] is None else max(stats['end'], batch_end)
+
+    return stats
+
+def export_csv_from_store(csv_filename=CSV_FILENAME, store_dir=STORE_DIR):
+    """Write the combined CSV one meter at a time, sorted by meter and Entry Datetime"""
+
+    totals = {'records': 0, 'meters': 0, 'import_sum': 0.0, 'export_sum': 0.0,
+              'import_max': -np.inf, 'export_max': -np.inf, 'start': None, 'end': None,
+              'high_water': {}}
+
+    write_header = True
+    for meter_id, meter_df in iter_meter_frames(store_dir=store_dir):
+        meter_df = meter_df.sort_values('Entry Datetime')
+        meter_df.to_csv(csv_filename, mode='w' if write_header else 'a', header=write_header, index=False)
+        write_header = False
+
+        totals['records'] += len(meter_df)
+        totals['meters'] += 1
+        # Store frames hold float32 power; total them in float64
+        totals['import_sum'] += meter_df[IMPORT_COL].astype(float).sum()
+        totals['export_sum'] += meter_df[EXPORT_COL].astype(float).sum()
+        totals['import_max'] = max(totals['import_max'], meter_df[IMPORT_COL].max())
+        totals['export_max'] = max(totals['export_max'], meter_df[EXPORT_COL].max())
+        meter_start, meter_end = meter_df['Entry Datetime'].min(), meter_df['Entry Datetime'].max()
+        totals['start'] = meter_start if totals['start'] is None else min(totals['start'], meter_start)
+        totals['end'] = meter_end if totals['end'] is None else max(totals['end'], meter_end)
+        totals['high_water'][meter_id] = meter_df['Meter Datetime'].max()
+
+    return totals
+
+def combine_and_export(excel_files=EXCEL_FILES, workers=None, batch_size=50000, store_dir=STORE_DIR):
+    # A full export rebuilds the store from scratch
+    if os.path.isdir(store_dir):
+        shutil.rmtree(store_dir)
+    manifest = load_manifest(store_dir)
+    rows_written = {}
+
+    # Each worker streams its workbook into the store, so memory is bounded by the batch size
+    print(f'Ingesting {len(excel_files)} files with batches of {batch_size:,} rows...')
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(ingest_excel_file, file, f'{i:04d}', store_dir, batch_size)
+                   for i, file in enumerate(excel_files)]
+        for future in futures:
+            stats = future.result()
+            rows_written[stats['file']] = stats['rows_written']
+            print(f'Processed {stats["file"]}')
+            if stats['invalid_rows']:
+                print(f'  Removed {stats["invalid_rows"]} rows with invalid datetime values')
+            print(f'  Rows written: {stats["rows_written"]:,} of {stats["rows_read"]:,}')
+            print(f'  Date range: {stats["start"]} to {stats["end"]}')
+            print(f'  Unique meters: {len(stats["meters"])}')
+            print()
 
     print('Individual file processing completed.')
-    
-    # Combine the dataframes
-    print('Combining datasets...')
-    combined_df = pd.concat(cleaned_dfs, ignore_index=True)
-    
-    # Remove any duplicates that might exist across files
-    before_shape = combined_df.shape[0]
-    combined_df = combined_df.drop_duplicates()
-    after_shape = combined_df.shape[0]
-    if before_shape != after_shape:
-        print(f'Removed {before_shape - after_shape} duplicate rows across files')
-    
-    # Sort by Entry Datetime and Meter ID for better organization
-    combined_df = combined_df.sort_values(['HES Meter Id', 'Entry Datetime'])
-    
-    print(f'Combined dataset shape: {combined_df.shape}')
-    print(f'Date range: {combined_df["Entry Datetime"].min()} to {combined_df["Entry Datetime"].max()}')
-    print(f'Total unique meters: {combined_df["HES Meter Id"].nunique()}')
-    
+
+    # Remove any duplicates that might exist across batches and files, one partition at a time
+    print('Compacting partitions...')
+    removed = compact_store(store_dir=store_dir)
+    if removed:
+        print(f'Removed {removed} duplicate rows across files')
+
     # Export to CSV
-    csv_filename = 'combined_load_profile_electrical.csv'
-    combined_df.to_csv(csv_filename, index=False)
-    print(f'Data exported to: {csv_filename}')
-    
+    totals = export_csv_from_store(CSV_FILENAME, store_dir)
+
+    print(f'Combined dataset records: {totals["records"]:,}')
+    print(f'Date range: {totals["start"]} to {totals["end"]}')
+    print(f'Total unique meters: {totals["meters"]}')
+    print(f'Data exported to: {CSV_FILENAME}')
+    print(f'Partitioned store written to: {store_dir}')
+
+    # Record what was ingested so later runs can be incremental
+    for file in excel_files:
+        record_ingested(manifest, file, file_manifest_entry(file), rows_written[file])
+    update_high_water(manifest, totals['high_water'])
+    save_manifest(manifest, store_dir)
+    build_day_index(store_dir)
+    build_meter_matrix(store_dir)
+
     # Display basic statistics
     print('\nBasic statistics:')
-    print(f'Total records: {len(combined_df):,}')
-    print(f'Average import power: {combined_df["Import active power (QI+QIV)[W]"].mean():.2f} W')
-    print(f'Average export power: {combined_df["Export active power (QII+QIII)[W]"].mean():.2f} W')
-    print(f'Max import power: {combined_df["Import active power (QI+QIV)[W]"].max():.2f} W')
-    print(f'Max export power: {combined_df["Export active power (QII+QIII)[W]"].max():.2f} W')
-    
-    return combined_df
+    print(f'Total records: {totals["records"]:,}')
+    print(f'Average import power: {totals["import_sum"] / max(totals["records"], 1):.2f} W')
+    print(f'Average export power: {totals["export_sum"] / max(totals["records"], 1):.2f} W')
+    print(f'Max import power: {totals["import_max"]:.2f} W')
+    print(f'Max export power: {totals["export_max"]:.2f} W')
+
+    return totals
+
+def incremental_ingest(excel_files, workers=None, batch_size=50000, store_dir=STORE_DIR, csv_filename=CSV_FILENAME):
+    """Ingest only workbooks missing from the manifest and append their unseen readings.
+
+    New rows go to the end of the combined CSV, partition by partition, so
+    after an incremental run the CSV is no longer sorted by meter and Entry
+    Datetime; readers must sort or group it themselves. A full export
+    rewrites it in order.
+    """
+
+    manifest = load_manifest(store_dir)
+
+    # Skip files whose content has been ingested before, whatever they are called now
+    entries = {}
+    for file in excel_files:
+        entry = file_manifest_entry(file, manifest)
+        if is_ingested(entry, manifest) or any(e['sha256'] == entry['sha256'] for e in entries.values()):
+            print(f'Skipping already ingested file: {file}')
+            continue
+        entries[file] = entry
+
+    if not entries:
+        print('No new files to ingest.')
+        return manifest
+
+    # Workers append raw part files named after the file hash, so they never collide with stored parts
+    print(f'Ingesting {len(entries)} new files with batches of {batch_size:,} rows...')
+    part_files = {}
+    rows_written = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(ingest_excel_file, file, entry['sha256'][:16], store_dir, batch_size)
+                   for file, entry in entries.items()]
+        for future in futures:
+            stats = future.result()
+            part_files[stats['file']] = stats['part_files']
+            rows_written[stats['file']] = stats['rows_written']
+            print(f'Processed {stats["file"]}: {stats["rows_written"]:,} of {stats["rows_read"]:,} rows')
+
+    # Only partitions that received rows are touched. Existing keys are only
+    # checked where the partition can hold readings at or before the meter's
+    # high-water mark; anything later is new by construction.
+    by_partition = {}
+    for files in part_files.values():
+        for part_file in files:
+            by_partition.setdefault(os.path.dirname(part_file), []).append(part_file)
+
+    added_rows = 0
+    added_high_water = {}
+    write_header = not os.path.exists(csv_filename)
+    for part_dir, new_files in sorted(by_partition.items()):
+        meter_id = os.path.basename(os.path.dirname(part_dir)).split('=', 1)[1]
+        month = os.path.basename(part_dir).split('=', 1)[1]
+        high_water = manifest['high_water'].get(meter_id)
+        check_existing = high_water is not None and month <= high_water[:7]
+
+        new_rows = merge_new_parts(part_dir, new_files, check_existing)
+        if len(new_rows) == 0:
+            continue
+
+        new_rows.to_csv(csv_filename, mode='w' if write_header else 'a', header=write_header, index=False)
+        write_header = False
+
+        added_rows += len(new_rows)
+        latest = new_rows['Meter Datetime'].max()
+        added_high_water[meter_id] = max(latest, added_high_water.get(meter_id, latest))
+
+    for file, entry in entries.items():
+        record_ingested(manifest, file, entry, rows_written[file])
+    update_high_water(manifest, added_high_water)
+    save_manifest(manifest, store_dir)
+    build_day_index(store_dir)
+    build_meter_matrix(store_dir)
+
+    print(f'Appended {added_rows:,} new rows to {csv_filename} and {store_dir}')
+    print(f'Meters updated: {len(added_high_water)}')
+
+    return manifest
 
 if __name__ == "__main__":
-    combined_data = combine_and_export()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Clean load profile workbooks into the combined CSV and partitioned store')
+    parser.add_argument('files', nargs='*', default=EXCEL_FILES, help='Readings_LoadProfileElectrical_V2 workbooks')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Rows cleaned per batch')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only ingest files missing from the store manifest and append their new rows')
+    args = parser.parse_args()
+
+    if args.incremental:
+        manifest = incremental_ingest(args.files, args.workers, args.batch_size)
+    else:
+        totals = combine_and_export(args.files, args.workers, args.batch_size)
@@ -0,0 +1,171 @@
+import os
+import glob
+import hashlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from meter_store import (STORE_DIR, METER_COL, TIME_COL, MANIFEST_FILENAME, list_meters, _meter_dir, _empty_frame,
+                         _compact_dtypes)
+
+# Sidecar of the store mapping every (meter, day) to the part files and row
+# offsets holding its readings:
+# load_profile_store/day_index.parquet
+DAY_INDEX_FILENAME = 'day_index.parquet'
+
+
+def _manifest_digest(store_dir=STORE_DIR):
+    """Hash of the ingest manifest; the index is stale once it changes"""
+
+    manifest_path = os.path.join(store_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return ''
+    with open(manifest_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _index_part_file(path, store_dir):
+    """(day, first row, last row) of every day found in one part file"""
+
+    times = pq.read_table(path, columns=[TIME_COL], partitioning=None).column(0)
+    days = times.to_numpy().astype('datetime64[D]').astype(np.int64)
+    if len(days) == 0:
+        return None
+
+    # Rows are sorted by Entry Datetime, so a day is contiguous in practice;
+    # first/last still bound it when a late reading lands out of order
+    frame = pd.DataFrame({'day': days, 'row': np.arange(len(days))})
+    spans = frame.groupby('day')['row'].agg(['min', 'max'])
+    return pd.DataFrame({'day': spans.index.to_numpy(), 'file': os.path.relpath(path, store_dir),
+                         'first_row': spans['min'].to_numpy(), 'last_row': spans['max'].to_numpy()})
+
+
+def build_day_index(store_dir=STORE_DIR):
+    """Scan the Meter Datetime column of every part file and persist the index"""
+
+    frames = []
+    for meter_id in list_meters(store_dir):
+        for path in sorted(glob.glob(os.path.join(_meter_dir(meter_id, store_dir), 'month=*', '*.parquet'))):
+            spans = _index_part_file(path, store_dir)
+            if spans is not None:
+                spans.insert(0, 'meter', meter_id)
+                frames.append(spans)
+
+    if frames:
+        index = pd.concat(frames, ignore_index=True).sort_values(['meter', 'day', 'file'], kind='stable')
+    else:
+        index = pd.DataFrame({'meter': pd.Series([], dtype=object), 'day': pd.Series([], dtype=np.int64),
+                              'file': pd.Series([], dtype=object), 'first_row': pd.Series([], dtype=np.int64),
+                              'last_row': pd.Series([], dtype=np.int64)})
+
+    table = pa.Table.from_pandas(index, preserve_index=False)
+    table = table.replace_schema_metadata({b'manifest_sha256': _manifest_digest(store_dir).encode()})
+    index_path = os.path.join(store_dir, DAY_INDEX_FILENAME)
+    pq.write_table(table, index_path + '.tmp')
+    os.replace(index_path + '.tmp', index_path)
+
+    print(f'Indexed {len(index):,} meter-days in {index_path}')
+
+    return DayIndex(index, store_dir)
+
+
+def load_day_index(store_dir=STORE_DIR):
+    """Load the persisted index, rebuilding it when the store has changed since it was written"""
+
+    index_path = os.path.join(store_dir, DAY_INDEX_FILENAME)
+    if os.path.exists(index_path):
+        table = pq.read_table(index_path)
+        metadata = table.schema.metadata or {}
+        if metadata.get(b'manifest_sha256', b'').decode() == _manifest_digest(store_dir):
+            return DayIndex(table.to_pandas(), store_dir)
+
+    return build_day_index(store_dir)
+
+
+class DayIndex:
+    """Sorted (meter, day) keys with binary-search lookups.
+
+    Meters are kept as a sorted array of ids with the offset of each meter's
+    first entry, and days as int64 day numbers sorted within each meter, so
+    both the exact lookup and the nearest-date query are two searchsorted
+    calls whatever the size of the store.
+    """
+
+    def __init__(self, index, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        self.index = index.reset_index(drop=True)
+
+        meters = self.index['meter'].to_numpy()
+        self.meters, self.meter_starts = np.unique(meters, return_index=True)
+        self.meter_ends = np.append(self.meter_starts[1:], len(meters))
+        self.days = self.index['day'].to_numpy(dtype=np.int64)
+
+    def __len__(self):
+        return len(self.index)
+
+    def _meter_span(self, meter_id):
+        pos = np.searchsorted(self.meters, meter_id)
+        if pos == len(self.meters) or self.meters[pos] != meter_id:
+            return 0, 0
+        return self.meter_starts[pos], self.meter_ends[pos]
+
+    @staticmethod
+    def _day_number(target_date):
+        return pd.Timestamp(target_date).to_datetime64().astype('datetime64[D]').astype(np.int64)
+
+    def dates(self, meter_id):
+        """All days with readings for a meter, as datetime64[D]"""
+
+        start, end = self._meter_span(meter_id)
+        return np.unique(self.days[start:end]).astype('datetime64[D]')
+
+    def lookup(self, meter_id, target_date):
+        """Index rows (file, first_row, last_row) holding the meter's readings for the day"""
+
+        start, end = self._meter_span(meter_id)
+        day = self._day_number(target_date)
+        lo = start + np.searchsorted(self.days[start:end], day, side='left')
+        hi = start + np.searchsorted(self.days[start:end], day, side='right')
+        return self.index.iloc[lo:hi]
+
+    def nearest_date(self, meter_id, target_date, max_days=None):
+        """Closest day with readings for the meter, or None if there is none within max_days.
+
+        Ties go to the earlier day.
+        """
+
+        start, end = self._meter_span(meter_id)
+        if start == end:
+            return None
+
+        days = self.days[start:end]
+        day = self._day_number(target_date)
+        pos = np.searchsorted(days, day)
+        candidates = [days[p] for p in (pos - 1, pos) if 0 <= p < len(days)]
+        closest = min(candidates, key=lambda d: (abs(d - day), d))
+
+        if max_days is not None and abs(closest - day) > max_days:
+            return None
+        return pd.Timestamp(np.datetime64(int(closest), 'D')).date()
+
+    def load_day(self, meter_id, target_date, columns=None):
+        """Read one meter's readings for a day using only the row spans the index points at"""
+
+        if columns is not None:
+            columns = list(dict.fromkeys([METER_COL, TIME_COL] + list(columns)))
+
+        start = pd.Timestamp(target_date).normalize()
+        end = start + pd.Timedelta(days=1)
+
+        tables = []
+        for entry in self.lookup(meter_id, target_date).itertuples():
+            table = pq.read_table(os.path.join(self.store_dir, entry.file), columns=columns,
+                                  partitioning=None, memory_map=True)
+            tables.append(table.slice(entry.first_row, entry.last_row - entry.first_row + 1))
+
+        if not tables:
+            return _empty_frame(columns, self.store_dir)
+
+        df = _compact_dtypes(pa.concat_tables(tables).to_pandas())
+        df = df[(df[TIME_COL] >= start) & (df[TIME_COL] < end)]
+        return df.sort_values(TIME_COL).reset_index(drop=True)
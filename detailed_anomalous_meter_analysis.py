@@ -3,8 +3,12 @@ import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+from meter_store import load_meter_data
+from profile_cache import (load_hourly_profiles, load_hourly_matrix, load_daily_profiles, profiles_cached,
+                           profile_time_series)
+from meter_grid import build_grid
+from heatmap import draw_heatmap
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -13,20 +17,26 @@ def analyze_specific_meter(meter_id='AES2020896472402'):
     
     print(f"Detailed analysis of meter: {meter_id}")
     
-    # Load data for specific meter
-    print("Loading data...")
-    df = pd.read_csv('combined_load_profile_electrical.csv')
-    df['Meter Datetime'] = pd.to_datetime(df['Meter Datetime'])
-    df['Hour'] = df['Meter Datetime'].dt.hour
-    df['Date'] = df['Meter Datetime'].dt.date
-    df['Day_of_week'] = df['Meter Datetime'].dt.day_name()
-    
-    # Filter for specific meter
-    meter_data = df[df['HES Meter Id'] == meter_id].copy()
+    # A profiled meter is served from the profile cache; raw readings only on a miss
+    daily_profiles = load_daily_profiles(meter_id) if profiles_cached() else None
+    if daily_profiles is not None and len(daily_profiles) > 0:
+        print("Loading cached profiles...")
+        hourly_stats = load_hourly_profiles(meter_id).loc[meter_id]
+        meter_data = profile_time_series(daily_profiles.loc[meter_id])
+        meter_data.insert(0, 'HES Meter Id', meter_id)
+    else:
+        print("Loading data...")
+        meter_data = load_meter_data([meter_id])
+        
+        if len(meter_data) == 0:
+            print(f"No data found for meter {meter_id}")
+            return
+        
+        meter_data['Hour'] = meter_data['Meter Datetime'].dt.hour
+        hourly_stats = meter_data.groupby('Hour')['Import active power (QI+QIV)[W]'].agg(
+            ['mean', 'median', 'max', 'min', 'count'])
     
-    if len(meter_data) == 0:
-        print(f"No data found for meter {meter_id}")
-        return
+    meter_data['Day_of_week'] = meter_data['Meter Datetime'].dt.day_name()
     
     print(f"Records for meter {meter_id}: {len(meter_data):,}")
     print(f"Date range: {meter_data['Meter Datetime'].min()} to {meter_data['Meter Datetime'].max()}")
@@ -36,8 +46,6 @@ def analyze_specific_meter(meter_id='AES2020896472402'):
     
     # Plot 1: 24-hour consumption pattern
     ax1 = plt.subplot(3, 3, 1)
-    hourly_stats = meter_data.groupby('Hour')['Import active power (QI+QIV)[W]'].agg(['mean', 'median', 'max', 'min'])
-    
     night_hours = list(range(21, 24)) + list(range(0, 5))
     colors = ['red' if hour in night_hours else 'blue' for hour in hourly_stats.index]
     
@@ -111,46 +119,43 @@ def analyze_specific_meter(meter_id='AES2020896472402'):
         ax5.grid(True, alpha=0.3)
         plt.setp(ax5.xaxis.get_majorticklabels(), rotation=45)
     
-    # Plot 6: Consumption heatmap by hour and day
+    # Plot 6: Consumption heatmap of every day by half-hour slot
     ax6 = plt.subplot(3, 3, (7, 8))
-    meter_data['Date_only'] = meter_data['Meter Datetime'].dt.date
-    
-    # Create pivot table for heatmap (sample recent data)
-    recent_data = meter_data[meter_data['Meter Datetime'] >= meter_data['Meter Datetime'].max() - pd.Timedelta(days=30)]
-    if len(recent_data) > 0:
-        pivot_data = recent_data.pivot_table(
-            values='Import active power (QI+QIV)[W]', 
-            index='Date_only', 
-            columns='Hour', 
-            aggfunc='mean'
-        )
-        
-        # Select last 15 days for visibility
-        if len(pivot_data) > 15:
-            pivot_data = pivot_data.tail(15)
-        
-        sns.heatmap(pivot_data, cmap='YlOrRd', cbar_kws={'label': 'Power (W)'}, ax=ax6)
-        ax6.set_title('Recent Daily Consumption Pattern (Last 30 days)')
+    grid = build_grid(meter_data)
+    day_values, day_valid = grid.days(meter_id)
+    if day_valid.any():
+        draw_heatmap(ax6, day_values, x_extent=(0, 24), colorbar_label='Power (W)', dpi=300)
+        ax6.set_title(f'Daily Consumption Pattern (all {day_valid.any(axis=1).sum()} days)')
         ax6.set_xlabel('Hour of Day')
         ax6.set_ylabel('Date')
+        ax6.set_xticks(range(0, 25, 2))
+        
+        # Label about a dozen days down the side
+        label_days = np.arange(0, grid.n_days, max(1, grid.n_days // 12))
+        ax6.set_yticks(label_days + 0.5)
+        ax6.set_yticklabels([f'{grid.dates[day]:%Y-%m-%d}' for day in label_days])
         
         # Highlight night hours
         for hour in night_hours:
-            if hour in pivot_data.columns:
-                ax6.axvline(x=pivot_data.columns.get_loc(hour)+0.5, color='blue', linestyle='--', alpha=0.7)
+            ax6.axvline(x=hour + 0.5, color='blue', linestyle='--', alpha=0.7)
     
     # Plot 7: Statistics summary
     ax7 = plt.subplot(3, 3, 9)
     ax7.axis('off')
     
-    # Calculate key statistics
-    overall_mean = meter_data['Import active power (QI+QIV)[W]'].mean()
-    overall_max = meter_data['Import active power (QI+QIV)[W]'].max()
-    overall_min = meter_data['Import active power (QI+QIV)[W]'].min()
-    night_mean = night_data.mean()
-    day_mean = day_data.mean()
-    night_min = night_data.min()
-    night_max = night_data.max()
+    # Calculate key statistics from the per-hour moments, which match the readings
+    def hours_mean(stats):
+        return (stats['mean'] * stats['count']).sum() / stats['count'].sum()
+    
+    night_stats = hourly_stats[hourly_stats.index.isin(night_hours)]
+    day_stats = hourly_stats[~hourly_stats.index.isin(night_hours)]
+    overall_mean = hours_mean(hourly_stats)
+    overall_max = hourly_stats['max'].max()
+    overall_min = hourly_stats['min'].min()
+    night_mean = hours_mean(night_stats)
+    day_mean = hours_mean(day_stats)
+    night_min = night_stats['min'].min()
+    night_max = night_stats['max'].max()
     
     stats_text = f"""
     ANOMALY ANALYSIS SUMMARY
@@ -202,21 +207,19 @@ if __name__ == "__main__":
     # Also create a simple comparison plot for multiple anomalous meters
     print("\nCreating comparison plot for top anomalous meters...")
     
-    df = pd.read_csv('combined_load_profile_electrical.csv')
-    df['Meter Datetime'] = pd.to_datetime(df['Meter Datetime'])
-    df['Hour'] = df['Meter Datetime'].dt.hour
-    
     anomalous_meters = ['AES2020896472402', 'KFM2020660044515', 'KFM2020660037773']
     
+    # Hourly averages come from the profile cache, not the raw readings
+    hourly_matrix = load_hourly_matrix(anomalous_meters)
+    
     fig, axes = plt.subplots(1, 3, figsize=(18, 6))
     night_hours = list(range(21, 24)) + list(range(0, 5))
     
     for i, meter_id in enumerate(anomalous_meters):
-        meter_data = df[df['HES Meter Id'] == meter_id]
-        if len(meter_data) == 0:
+        hourly_avg = hourly_matrix.loc[meter_id].dropna()
+        if len(hourly_avg) == 0:
             continue
             
-        hourly_avg = meter_data.groupby('Hour')['Import active power (QI+QIV)[W]'].mean()
         colors = ['red' if hour in night_hours else 'blue' for hour in hourly_avg.index]
         
         axes[i].bar(hourly_avg.index, hourly_avg.values, color=colors, alpha=0.7)
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from meter_store import METER_COL, TIME_COL
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+
+# Load profile readings are taken every 30 minutes; a delta longer than
+# GAP_FACTOR intervals means readings are missing
+READING_INTERVAL = pd.Timedelta(minutes=30)
+GAP_FACTOR = 1.5
+
+# Gaps up to this long are filled by the hold/linear policies, longer ones stay missing
+MAX_FILL = pd.Timedelta(hours=2)
+
+# How a gap between two readings is counted:
+#   none   - only the reading's own interval, the rest of the gap is missing time
+#   hold   - the reading's power held until the next reading
+#   linear - power interpolated linearly from the reading to the next one
+POLICIES = ('none', 'hold', 'linear')
+
+# Windows with less of their time covered are not compared against complete ones
+MIN_COVERAGE = 0.9
+
+HOUR_NS = 3600 * 10**9
+
+
+def _power_segments(df, policy, interval, max_fill):
+    # Readings sorted by meter and time, and the power curve each one stands
+    # for: constant power over const_h hours from the reading, then (linear
+    # policy, filled gaps only) a ramp to the next reading over ramp_h hours
+    if policy not in POLICIES:
+        raise ValueError(f'Unknown gap policy {policy!r}, expected one of {POLICIES}')
+
+    df = df.sort_values([METER_COL, TIME_COL], kind='stable').reset_index(drop=True)
+    times = df[TIME_COL].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    power = df[POWER_COL].to_numpy(dtype=float)
+    meters = df[METER_COL].to_numpy()
+
+    interval_h = interval / pd.Timedelta(hours=1)
+    last = np.ones(len(df), dtype=bool)
+    last[:-1] = meters[1:] != meters[:-1]
+
+    delta_h = np.full(len(df), interval_h)
+    delta_h[:-1] = (times[1:] - times[:-1]) / HOUR_NS
+    delta_h[last] = interval_h
+    next_power = np.append(power[1:], np.nan)
+    next_power[last] = np.nan
+
+    gap = delta_h > GAP_FACTOR * interval_h
+    filled = gap & (delta_h <= max_fill / pd.Timedelta(hours=1)) & (policy != 'none')
+
+    const_h = np.where(gap & ~filled, interval_h, delta_h)
+    ramp_h = np.zeros(len(df))
+    if policy == 'linear':
+        # The reading's own interval, then a straight line to the next reading
+        const_h = np.where(filled, interval_h, const_h)
+        ramp_h = np.where(filled, delta_h - interval_h, 0.0)
+
+    # Missing power values count as missing time, not as zero consumption
+    missing = np.isnan(power) | (filled & np.isnan(next_power))
+    const_h = np.where(missing, 0.0, const_h)
+    ramp_h = np.where(missing, 0.0, ramp_h)
+    next_power = np.where(ramp_h > 0, next_power, power)
+
+    return df, times, last, power, next_power, const_h, ramp_h, gap
+
+
+def interval_energy(df, policy='linear', interval=READING_INTERVAL, max_fill=MAX_FILL):
+    """Energy of every reading's interval, from the power and the actual time to the next reading.
+
+    Each reading stands for the power from its timestamp until the next
+    reading of the same meter (the last one for one interval). Deltas longer
+    than GAP_FACTOR intervals are gaps, counted according to policy.
+    Returns the readings sorted by meter and time with energy_wh (Wh),
+    covered_h (hours the energy stands for) and gap (bool) columns added.
+    Use hourly_energy to total a window: an interval can run past the end
+    of the hour its reading falls in.
+    """
+
+    df, _, _, power, next_power, const_h, ramp_h, gap = _power_segments(df, policy, interval, max_fill)
+
+    df['energy_wh'] = np.where(const_h + ramp_h > 0, power * const_h + (power + next_power) / 2 * ramp_h, 0.0)
+    df['covered_h'] = const_h + ramp_h
+    df['gap'] = gap
+    return df
+
+
+def hourly_energy(df, policy='linear', interval=READING_INTERVAL, max_fill=MAX_FILL):
+    """Energy and covered time of every meter per clock hour.
+
+    The power curve of interval_energy is cut at hour boundaries, so an
+    interval or filled gap running past the hour counts towards each hour it
+    spans in proportion, and no hour holds more than one hour of readings.
+    Returns one row per meter and hour with readings: HES Meter Id, Meter
+    Datetime (start of the hour), energy_wh and covered_h.
+    """
+
+    df, times, last, power, next_power, const_h, ramp_h, _ = _power_segments(df, policy, interval, max_fill)
+
+    # Both pieces of every reading as [start, end) ns with power start + slope * elapsed,
+    # interleaved so the pieces stay in meter and time order
+    const_ns = np.round(const_h * HOUR_NS).astype(np.int64)
+    ramp_ns = np.round(ramp_h * HOUR_NS).astype(np.int64)
+    seg_start = np.column_stack([times, times + const_ns]).ravel()
+    seg_end = np.column_stack([times + const_ns, times + const_ns + ramp_ns]).ravel()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(ramp_ns > 0, (next_power - power) / ramp_ns, 0.0)
+    seg_power = np.repeat(power, 2)
+    seg_slope = np.column_stack([np.zeros(len(df)), slope]).ravel()
+    seg_row = np.repeat(np.arange(len(df)), 2)
+
+    keep = seg_end > seg_start
+    seg_start, seg_end, seg_power, seg_slope, seg_row = (
+        seg_start[keep], seg_end[keep], seg_power[keep], seg_slope[keep], seg_row[keep])
+    if not len(seg_start):
+        return pd.DataFrame({METER_COL: df[METER_COL].iloc[:0], TIME_COL: df[TIME_COL].iloc[:0],
+                             'energy_wh': np.zeros(0), 'covered_h': np.zeros(0)})
+
+    # One piece per clock hour each segment touches
+    first_hour = seg_start // HOUR_NS
+    n_pieces = (seg_end - 1) // HOUR_NS - first_hour + 1
+    piece_seg = np.repeat(np.arange(len(seg_start)), n_pieces)
+    hour = first_hour[piece_seg] + np.arange(len(piece_seg)) - np.repeat(np.cumsum(n_pieces) - n_pieces, n_pieces)
+    a = np.maximum(seg_start[piece_seg], hour * HOUR_NS)
+    b = np.minimum(seg_end[piece_seg], (hour + 1) * HOUR_NS)
+    covered_h = (b - a) / HOUR_NS
+    energy_wh = (seg_power[piece_seg] + seg_slope[piece_seg] * ((a + b) / 2 - seg_start[piece_seg])) * covered_h
+
+    # Pieces are ordered by meter and hour; sum each run of equal (meter, hour)
+    piece_row = seg_row[piece_seg]
+    meter_code = np.cumsum(np.concatenate([[False], last[:-1]]))[piece_row]
+    starts = np.flatnonzero(np.concatenate([[True], (meter_code[1:] != meter_code[:-1]) | (hour[1:] != hour[:-1])]))
+    return pd.DataFrame({METER_COL: df[METER_COL].iloc[piece_row[starts]].reset_index(drop=True),
+                         TIME_COL: (hour[starts] * HOUR_NS).astype('datetime64[ns]'),
+                         'energy_wh': np.add.reduceat(energy_wh, starts),
+                         'covered_h': np.add.reduceat(covered_h, starts)})
+
+
+def energy_totals(energy, keys, expected_hours):
+    """Energy in kWh and the covered share of expected_hours per group of hourly_energy rows"""
+
+    # observed=True: meter ids read by read_readings_csv are categorical
+    totals = energy.groupby(keys, sort=True, observed=True)[['energy_wh', 'covered_h']].sum()
+    return pd.DataFrame({'energy_kwh': totals['energy_wh'] / 1000,
+                         'coverage': totals['covered_h'] / expected_hours})
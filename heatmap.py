@@ -0,0 +1,84 @@
+import numpy as np
+import matplotlib
+from matplotlib.colors import Normalize
+
+# Image heatmaps for matrices of any size (meters x hours, days x slots,
+# meters x a year of slots). The matrix is drawn as one imshow image instead
+# of one artist per cell, after block-averaging it down to at most one cell
+# per output pixel.
+
+# Axes with more rows than this get no per-row tick labels
+MAX_ROW_LABELS = 40
+
+
+def _block_means(rows, row_factor, col_factor, n_cols):
+    # Pad with NaN to whole blocks, then average each block ignoring missing cells
+    padded = np.full((-(-len(rows) // row_factor) * row_factor, -(-n_cols // col_factor) * col_factor), np.nan)
+    padded[:len(rows), :n_cols] = rows
+    blocks = padded.reshape(padded.shape[0] // row_factor, row_factor, padded.shape[1] // col_factor, col_factor)
+    present = ~np.isnan(blocks)
+    counts = present.sum(axis=(1, 3))
+    sums = np.where(present, blocks, 0.0).sum(axis=(1, 3))
+    with np.errstate(invalid='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def downsample(matrix, max_rows, max_cols, chunk_rows=256):
+    """Block nanmean of a 2D matrix by the smallest integer factors that fit max_rows x max_cols.
+
+    The matrix (possibly memory-mapped) is read a band of rows at a time, so
+    only one band is ever held as float64. Returns the reduced matrix and
+    the (row, col) factors.
+    """
+
+    rows, cols = matrix.shape
+    row_factor = max(1, -(-rows // max(max_rows, 1)))
+    col_factor = max(1, -(-cols // max(max_cols, 1)))
+    if row_factor == 1 and col_factor == 1:
+        return np.asarray(matrix, dtype=np.float64), (1, 1)
+
+    band = max(1, chunk_rows // row_factor) * row_factor
+    reduced = [_block_means(np.asarray(matrix[start:start + band], dtype=np.float64), row_factor, col_factor, cols)
+               for start in range(0, rows, band)]
+    return np.vstack(reduced), (row_factor, col_factor)
+
+
+def axes_pixels(ax, dpi=None):
+    """Width and height of an axes in pixels when saved at dpi (default: the figure's)"""
+
+    bbox = ax.get_window_extent()
+    scale = (dpi or ax.figure.dpi) / ax.figure.dpi
+    return max(int(bbox.width * scale), 1), max(int(bbox.height * scale), 1)
+
+
+def draw_heatmap(ax, matrix, x_extent=None, row_labels=None, cmap='YlOrRd', colorbar_label=None,
+                 missing_color='lightgray', dpi=None):
+    """Draw a rows x columns matrix as one image sized to the axes.
+
+    Columns span x_extent (default 0..n_columns) so hour/slot axes keep
+    their units; rows run top to bottom. Missing cells are drawn in
+    missing_color. dpi is the resolution the figure will be saved at.
+    Returns the AxesImage.
+    """
+
+    n_rows, n_cols = matrix.shape
+    width, height = axes_pixels(ax, dpi)
+    image, (row_factor, _) = downsample(matrix, height, width)
+
+    x_extent = x_extent or (0, n_cols)
+    cmap = matplotlib.colormaps[cmap].copy()
+    cmap.set_bad(missing_color)
+    finite = image[np.isfinite(image)]
+    norm = Normalize(finite.min(), finite.max()) if len(finite) else None
+
+    im = ax.imshow(np.ma.masked_invalid(image), aspect='auto', interpolation='nearest', cmap=cmap, norm=norm,
+                   extent=(x_extent[0], x_extent[1], n_rows, 0))
+
+    if row_labels is not None and n_rows <= MAX_ROW_LABELS and row_factor == 1:
+        ax.set_yticks(np.arange(n_rows) + 0.5)
+        ax.set_yticklabels(row_labels)
+
+    if colorbar_label is not None:
+        ax.figure.colorbar(im, ax=ax, label=colorbar_label)
+
+    return im
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# HES exports write datetimes as fixed-width text, e.g. 'May 30, 2022, 00:30:00:000000'
+HES_FORMAT = '%b %d, %Y, %H:%M:%S.%f'
+HES_WIDTH = 29
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Character positions of each field and of the fixed separators
+DIGIT_FIELDS = {'day': (4, 6), 'year': (8, 12), 'hour': (14, 16), 'minute': (17, 19),
+                'second': (20, 22), 'microsecond': (23, 29)}
+SEPARATORS = {3: ' ', 6: ',', 7: ' ', 12: ',', 13: ' ', 16: ':', 19: ':', 22: ':'}
+
+
+def _month_keys():
+    keys = np.array([ord(m[0]) << 16 | ord(m[1]) << 8 | ord(m[2]) for m in MONTHS], dtype=np.int64)
+    order = np.argsort(keys)
+    return keys[order], np.arange(1, 13)[order]
+
+
+MONTH_KEYS, MONTH_NUMBERS = _month_keys()
+
+
+def _code_points(values):
+    return np.asarray(values, dtype=f'U{HES_WIDTH}').view(np.uint32).reshape(-1, HES_WIDTH).astype(np.int64)
+
+
+def _separators_match(chars):
+    """Rows of code points with every fixed separator in place"""
+
+    match = np.ones(len(chars), dtype=bool)
+    for pos, sep in SEPARATORS.items():
+        match &= chars[:, pos] == ord(sep)
+    return match
+
+
+def _parse_fixed_width(values):
+    """Parse equal-width HES strings arithmetically on their code points.
+
+    Returns datetime64[ns] values with NaT wherever a field is malformed.
+    """
+
+    chars = _code_points(values)
+    valid = _separators_match(chars)
+
+    fields = {}
+    for name, (start, end) in DIGIT_FIELDS.items():
+        digits = chars[:, start:end] - ord('0')
+        valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+        fields[name] = digits @ (10 ** np.arange(end - start - 1, -1, -1))
+
+    month_key = chars[:, 0] << 16 | chars[:, 1] << 8 | chars[:, 2]
+    month_pos = np.searchsorted(MONTH_KEYS, month_key).clip(0, len(MONTH_KEYS) - 1)
+    valid &= MONTH_KEYS[month_pos] == month_key
+    month = MONTH_NUMBERS[month_pos]
+
+    valid &= (fields['day'] >= 1) & (fields['hour'] < 24) & (fields['minute'] < 60) & (fields['second'] < 60)
+
+    months = ((fields['year'] - 1970) * 12 + month - 1).astype('datetime64[M]')
+    dates = months.astype('datetime64[D]') + (fields['day'] - 1).astype('timedelta64[D]')
+    # Day 31 of a 30-day month rolls into the next month
+    valid &= dates.astype('datetime64[M]') == months
+
+    micros = (((fields['hour'] * 60 + fields['minute']) * 60 + fields['second']) * 1_000_000
+              + fields['microsecond'])
+    parsed = dates.astype('datetime64[ns]') + micros.astype('timedelta64[us]')
+    parsed[~valid] = np.datetime64('NaT')
+
+    return parsed
+
+
+def _parse_slow(values):
+    """The original regex + to_datetime route, for values that are not fixed-width text"""
+
+    values = pd.Series(values, dtype=object).astype(str)
+    values = values.str.replace(r':(\d{6})$', r'.\1', regex=True)
+    return pd.to_datetime(values, format=HES_FORMAT, errors='coerce').to_numpy(dtype='datetime64[ns]')
+
+
+def parse_unique_values(uniques):
+    """Parse distinct raw cell values: fixed-width strings with the HES separators
+    on the fast path, datetimes as-is, anything else (including other
+    separators, e.g. '.' before the microseconds) through the original slow path"""
+
+    uniques = np.asarray(uniques, dtype=object)
+    parsed = np.full(len(uniques), np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    is_str = np.fromiter((isinstance(v, str) for v in uniques), dtype=bool, count=len(uniques))
+    lengths = np.fromiter((len(v) if isinstance(v, str) else -1 for v in uniques), dtype=np.int64,
+                          count=len(uniques))
+    fast = is_str & (lengths == HES_WIDTH)
+    if fast.any():
+        fast[fast] = _separators_match(_code_points(uniques[fast]))
+    if fast.any():
+        parsed[fast] = _parse_fixed_width(uniques[fast])
+
+    # Workbooks occasionally hold real datetime cells instead of text
+    is_datetime = np.fromiter((isinstance(v, (datetime, np.datetime64)) for v in uniques), dtype=bool,
+                              count=len(uniques))
+    if is_datetime.any():
+        parsed[is_datetime] = pd.to_datetime(pd.Series(uniques[is_datetime]), errors='coerce').to_numpy(
+            dtype='datetime64[ns]')
+
+    slow = is_str & ~fast
+    if slow.any():
+        parsed[slow] = _parse_slow(uniques[slow])
+
+    return parsed
+
+
+def parse_hes_datetimes(*columns):
+    """Parse one or more columns of HES datetimes with a shared cache of parsed timestamps.
+
+    All columns are factorized together, so every distinct value (Entry and
+    Meter Datetime mostly repeat each other) is parsed exactly once. Returns
+    the parsed datetime64[ns] arrays, one per column, and a boolean mask of
+    the rows rejected in any column.
+    """
+
+    raw = [np.asarray(col, dtype=object) for col in columns]
+    codes, uniques = pd.factorize(np.concatenate(raw), use_na_sentinel=True)
+    parsed_uniques = np.append(parse_unique_values(uniques), np.datetime64('NaT'))
+
+    # Missing cells get code -1, which picks the trailing NaT
+    parsed = parsed_uniques[codes]
+
+    results = []
+    rejected = np.zeros(len(raw[0]) if raw else 0, dtype=bool)
+    offset = 0
+    for col in raw:
+        values = parsed[offset:offset + len(col)]
+        rejected |= np.isnat(values)
+        results.append(values)
+        offset += len(col)
+
+    return results, rejected
@@ -1,31 +1,23 @@
 from manim import *
-import pandas as pd
-import numpy as np
+from scene_data import NIGHT_HOURS, scene_source, highest_night, night_day_profile
 
 class HighestNightConsumptionAnimation(Scene):
+    # Data source; METER_CSV / METER_ID in the environment fill in whichever is None
+    csv_filename = None
+    meter_id = None
+    
     def construct(self):
-        # Load and process the data
-        df = pd.read_csv("cleaned_meter_KFM2020660190982.csv")
-        df["Meter Datetime"] = pd.to_datetime(df["Meter Datetime"])
-        df = df.sort_values("Meter Datetime")
-        
-        # Add hour and date columns
-        df['hour'] = df['Meter Datetime'].dt.hour
-        df['date'] = df['Meter Datetime'].dt.date
-        
-        # Get data for June 20, 2022 (highest night consumption day)
-        target_date = pd.to_datetime('2022-06-20').date()
-        day_data = df[df['date'] == target_date].copy()
-        
-        # Convert to hourly data (taking one reading per hour)
-        hourly_data = day_data.groupby('hour')['Import active power (QI+QIV)[W]'].first().reset_index()
+        # Find the meter's highest night consumption day; readings are cached between renders
+        csv_filename, meter_id = scene_source(self.csv_filename, self.meter_id)
+        target_date, night_total = highest_night(csv_filename, meter_id)
+        hourly_data = night_day_profile(csv_filename, meter_id, target_date)
         
         # Define night hours (9 PM to 4 AM)
-        night_hours = [21, 22, 23, 0, 1, 2, 3]
+        night_hours = NIGHT_HOURS
         
         # Create title
         title = Text("Highest Night Consumption Day", font_size=36, color=BLUE)
-        subtitle = Text("June 20, 2022 - Total Night: 2976W", font_size=24, color=GRAY)
+        subtitle = Text(f"{target_date:%B %d, %Y} - Total Night: {night_total:.2f} kWh", font_size=24, color=GRAY)
         title.to_edge(UP)
         subtitle.next_to(title, DOWN, buff=0.3)
         self.add(title, subtitle)
@@ -73,13 +65,36 @@ class HighestNightConsumptionAnimation(Scene):
         legend.to_corner(UR, buff=0.5)
         self.play(Write(legend))
         
-        # Current hour display
-        current_hour_text = Text("Hour: 0", font_size=24, color=YELLOW)
-        current_power_text = Text("Power: 0W", font_size=24, color=YELLOW)
+        # Current hour display: the labels are built once and the numbers
+        # follow trackers, so no Text is created per hour. DecimalNumber keeps
+        # one Text per distinct character and reuses it for every value.
+        hour_tracker = ValueTracker(0)
+        power_tracker = ValueTracker(0)
+        
+        # Half-hourly days show hours like 21.5
+        hour_decimals = 0 if (hourly_data['hour'] % 1 == 0).all() else 1
+        
+        hour_label = Text("Hour:", font_size=24, color=YELLOW)
+        hour_number = DecimalNumber(0, num_decimal_places=hour_decimals, mob_class=Text,
+                                    font_size=24, color=YELLOW)
+        power_label = Text("Power:", font_size=24, color=YELLOW)
+        power_number = DecimalNumber(0, num_decimal_places=0, mob_class=Text, font_size=24, color=YELLOW)
+        power_unit = Text("W", font_size=24, color=YELLOW)
         
-        current_hour_text.to_corner(UL, buff=0.5)
-        current_power_text.next_to(current_hour_text, DOWN, buff=0.2)
-        self.add(current_hour_text, current_power_text)
+        hour_label.to_corner(UL, buff=0.5)
+        power_label.next_to(hour_label, DOWN, buff=0.2, aligned_edge=LEFT)
+        
+        def follow(number, tracker, anchor):
+            number.add_updater(lambda m: m.set_value(tracker.get_value()).next_to(anchor, RIGHT, buff=0.15))
+        
+        follow(hour_number, hour_tracker, hour_label)
+        follow(power_number, power_tracker, power_label)
+        power_unit.add_updater(lambda m: m.next_to(power_number, RIGHT, buff=0.05))
+        self.add(hour_label, hour_number, power_label, power_number, power_unit)
+        
+        # Shown below the readout during night hours
+        night_indicator = Text("NIGHT HOUR", font_size=20, color=RED)
+        night_indicator.next_to(power_label, DOWN, buff=0.2, aligned_edge=LEFT)
         
         # Create all line segments
         all_segments = []
@@ -119,21 +134,12 @@ class HighestNightConsumptionAnimation(Scene):
             hour = hourly_data.iloc[i]['hour']
             power = hourly_data.iloc[i]['Import active power (QI+QIV)[W]']
             
-            # Update text displays
-            new_hour_text = Text(f"Hour: {hour}", font_size=24, color=YELLOW)
-            new_power_text = Text(f"Power: {power:.0f}W", font_size=24, color=YELLOW)
-            new_hour_text.move_to(current_hour_text.get_center())
-            new_power_text.move_to(current_power_text.get_center())
-            
-            # Show if it's a night hour
-            night_indicator = Text("NIGHT HOUR", font_size=20, color=RED) if hour in night_hours else Text("", font_size=20)
-            night_indicator.next_to(new_power_text, DOWN, buff=0.2)
-            
             self.play(
                 Create(dot),
                 Create(segment),
-                Transform(current_hour_text, new_hour_text),
-                Transform(current_power_text, new_power_text),
+                hour_tracker.animate.set_value(hour),
+                power_tracker.animate.set_value(power),
+                # Show if it's a night hour
                 Write(night_indicator) if hour in night_hours else Wait(0),
                 run_time=0.3
             )
@@ -145,15 +151,11 @@ class HighestNightConsumptionAnimation(Scene):
         # Add final dot
         final_hour = hourly_data.iloc[-1]['hour']
         final_power = hourly_data.iloc[-1]['Import active power (QI+QIV)[W]']
-        new_hour_text = Text(f"Hour: {final_hour}", font_size=24, color=YELLOW)
-        new_power_text = Text(f"Power: {final_power:.0f}W", font_size=24, color=YELLOW)
-        new_hour_text.move_to(current_hour_text.get_center())
-        new_power_text.move_to(current_power_text.get_center())
         
         self.play(
             Create(all_dots[-1]),
-            Transform(current_hour_text, new_hour_text),
-            Transform(current_power_text, new_power_text),
+            hour_tracker.animate.set_value(final_hour),
+            power_tracker.animate.set_value(final_power),
             run_time=0.3
         )
         
@@ -172,7 +174,7 @@ class HighestNightConsumptionAnimation(Scene):
         # Show statistics
         night_data = hourly_data[hourly_data['hour'].isin(night_hours)]
         stats = VGroup(
-            Text(f"Night Hours Total: {night_data['Import active power (QI+QIV)[W]'].sum():.0f}W", font_size=20, color=RED),
+            Text(f"Night Hours Total: {night_total:.2f} kWh", font_size=20, color=RED),
             Text(f"Night Hours Avg: {night_data['Import active power (QI+QIV)[W]'].mean():.0f}W", font_size=20, color=RED),
             Text(f"Peak Night: {night_data['Import active power (QI+QIV)[W]'].max():.0f}W", font_size=20, color=RED),
         ).arrange(DOWN, aligned_edge=LEFT)
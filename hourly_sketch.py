@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+# Relative accuracy of the median sketch: a reported median is within 1% of
+# a reading whose rank is the median rank
+RELATIVE_ACCURACY = 0.01
+
+# Readings at or below zero share one bucket that reports 0 W
+ZERO_BUCKET = np.iinfo(np.int32).min
+
+
+class HourlyStatsSketch:
+    """Mergeable per-(meter, hour) summary of power readings.
+
+    Holds Welford moments (count, mean, sum of squared deviations), min and
+    max for every (meter, hour), plus a log-bucketed histogram of the
+    readings for the median. Sketches built from separate chunks, files or
+    processes combine exactly for count/mean/std/min/max; the median is
+    within RELATIVE_ACCURACY of the median reading whatever the merge order.
+    """
+
+    def __init__(self, moments=None, buckets=None, relative_accuracy=RELATIVE_ACCURACY):
+        index = pd.MultiIndex.from_arrays([[], []], names=['HES Meter Id', 'Hour'])
+        if moments is None:
+            moments = pd.DataFrame({'count': [], 'mean': [], 'm2': [], 'min': [], 'max': []}, index=index)
+        if buckets is None:
+            buckets = pd.Series([], dtype='int64', name='count',
+                                index=pd.MultiIndex.from_arrays([[], [], []],
+                                                                names=['HES Meter Id', 'Hour', 'bucket']))
+
+        self.moments = moments
+        self.buckets = buckets
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+
+    @classmethod
+    def from_readings(cls, meter_ids, hours, power, relative_accuracy=RELATIVE_ACCURACY):
+        """Summarize one batch of readings"""
+
+        sketch = cls(relative_accuracy=relative_accuracy)
+
+        power = pd.Series(np.asarray(power, dtype=float))
+        keys = [pd.Series(np.asarray(meter_ids), name='HES Meter Id'),
+                pd.Series(np.asarray(hours), name='Hour')]
+
+        grouped = power.groupby(keys)
+        count = grouped.count()
+        sketch.moments = pd.DataFrame({
+            'count': count,
+            'mean': grouped.mean(),
+            'm2': grouped.var(ddof=0) * count,
+            'min': grouped.min(),
+            'max': grouped.max(),
+        })
+
+        # Missing readings are left out of the histogram, as median() skips them
+        present = power.notna().to_numpy()
+        bucket = pd.Series(sketch._bucket_keys(power.to_numpy()), name='bucket')
+        sketch.buckets = power[present].groupby([key[present] for key in keys + [bucket]]).size().rename('count')
+
+        return sketch
+
+    @classmethod
+    def combine(cls, sketches):
+        """Merge any number of sketches in one pass"""
+
+        sketches = list(sketches)
+        merged = cls(relative_accuracy=sketches[0].relative_accuracy)
+        if any(s.relative_accuracy != merged.relative_accuracy for s in sketches):
+            raise ValueError('Cannot merge sketches with different relative accuracy')
+
+        merged.moments = _merge_moments(pd.concat([s.moments for s in sketches]), level=[0, 1])
+        merged.buckets = pd.concat([s.buckets for s in sketches]).groupby(level=[0, 1, 2]).sum()
+
+        return merged
+
+    def merge(self, other):
+        """Merge with another sketch, returning a new one"""
+        return HourlyStatsSketch.combine([self, other])
+
+    def _bucket_keys(self, values):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            keys = np.ceil(np.log(values) / np.log(self.gamma))
+        return np.where(values > 0, keys, ZERO_BUCKET).astype(np.int64)
+
+    def _bucket_values(self, keys):
+        keys = np.asarray(keys)
+        with np.errstate(over='ignore', under='ignore'):
+            values = 2 * self.gamma ** keys.astype(float) / (self.gamma + 1)
+        return np.where(keys == ZERO_BUCKET, 0.0, values)
+
+    def _medians(self, buckets):
+        """Median of every group of a bucket-count Series whose last index level is the bucket"""
+
+        groups = list(range(buckets.index.nlevels - 1))
+        buckets = buckets.sort_index()
+        counts = buckets.to_frame('count')
+        counts['cumulative'] = buckets.groupby(level=groups).cumsum()
+        total = buckets.groupby(level=groups).transform('sum')
+
+        # First bucket whose cumulative count passes the median rank
+        counts = counts[counts['cumulative'] > (total - 1) // 2]
+        first = counts.groupby(level=groups).head(1)
+
+        medians = pd.Series(self._bucket_values(first.index.get_level_values(-1)),
+                            index=first.index.droplevel(-1))
+        return medians
+
+    def hourly_stats(self):
+        """Per-(meter, hour) frame with the columns analyze_hourly_patterns produces"""
+
+        stats = _stats_from_moments(self.moments)
+        stats.insert(1, 'median', self._medians(self.buckets).reindex(stats.index))
+        return stats.reset_index()
+
+    def meter_stats(self):
+        """Per-meter frame with the columns analyze_hourly_patterns produces"""
+
+        moments = _merge_moments(self.moments, level=0)
+        stats = _stats_from_moments(moments).drop(columns='count')
+        meter_buckets = self.buckets.groupby(level=[0, 2]).sum()
+        stats.insert(1, 'median', self._medians(meter_buckets).reindex(stats.index))
+        return stats.reset_index()
+
+
+def _merge_moments(moments, level):
+    """Combine partial moments sharing an index key (Chan et al. parallel variance)"""
+
+    grouped = moments.groupby(level=level)
+    count = grouped['count'].sum()
+    mean = (moments['count'] * moments['mean']).groupby(level=level).sum() / count
+
+    # Each part's squared deviations plus the spread of its mean around the merged mean
+    group_mean = mean.reindex(moments.index.droplevel(
+        [n for n in range(moments.index.nlevels) if n not in np.atleast_1d(level)])).to_numpy()
+    spread = moments['count'] * (moments['mean'].to_numpy() - group_mean) ** 2
+    m2 = (moments['m2'] + spread).groupby(level=level).sum()
+
+    return pd.DataFrame({'count': count, 'mean': mean, 'm2': m2,
+                         'min': grouped['min'].min(), 'max': grouped['max'].max()})
+
+
+def _stats_from_moments(moments):
+    """Mean/max/min/std/count; std is the sample std like pandas"""
+
+    count = moments['count']
+    return pd.DataFrame({
+        'mean': moments['mean'],
+        'max': moments['max'],
+        'min': moments['min'],
+        'std': np.sqrt(moments['m2'] / (count - 1)).where(count > 1),
+        'count': count.astype('int64'),
+    })
@@ -1,54 +1,20 @@
 from manim import *
-import pandas as pd
 import numpy as np
-from datetime import datetime
+from scene_data import scene_source, consumption_days
 
 
 class MeterConsumptionAnimation(Scene):
+    # Data source; METER_CSV / METER_ID in the environment fill in whichever is None
+    csv_filename = None
+    meter_id = None
+
     def construct(self):
-        # Load and process the data
-        df = pd.read_csv("cleaned_meter_KFM2020660190982.csv")
-        df["Meter Datetime"] = pd.to_datetime(df["Meter Datetime"])
-        df = df.sort_values("Meter Datetime")
-
-        # Sample every 2nd point to get hourly data (from 30min intervals)
-        df_hourly = df.iloc[::2].reset_index(drop=True)
-
-        # Reduced to 4 weeks for faster rendering
-        week_starts = [
-            0,  # Week 1: Spring
-            800,  # Week 2: Summer
-            1600,  # Week 3: Fall
-            2400,  # Week 4: Winter
-        ]
-
-        # Season names for display
-        season_names = ["Spring", "Summer", "Fall", "Winter"]
-
-        # Use same color for all seasons
-        season_colors = [BLUE] * 4
-
-        # Get weeks data for each season
-        all_weeks_data = []
-        valid_weeks = []
-        valid_seasons = []
-        valid_colors = []
-
-        for i, start_idx in enumerate(week_starts):
-            week_end = start_idx + 168  # 7 days * 24 hours
-            if week_end <= len(df_hourly):
-                week_data = df_hourly.iloc[start_idx:week_end]
-                if len(week_data) == 168:  # Ensure complete week
-                    all_weeks_data.append(week_data)
-                    valid_weeks.append(i + 1)
-                    valid_seasons.append(season_names[i])
-                    valid_colors.append(season_colors[i])
+        # Hourly readings of one complete week per calendar season, cached between renders
+        csv_filename, meter_id = scene_source(self.csv_filename, self.meter_id)
+        valid_seasons, day_values = consumption_days(csv_filename, meter_id)
 
         # Get overall max for consistent y-axis across all weeks
-        all_power_values = []
-        for week_data in all_weeks_data:
-            all_power_values.extend(week_data["Import active power (QI+QIV)[W]"].values)
-        max_power = np.max(all_power_values)
+        max_power = np.max(day_values)
 
         # Add subtle background for professional look
         background = Rectangle(
@@ -100,69 +66,64 @@ class MeterConsumptionAnimation(Scene):
 
         self.play(Write(hour_labels))
 
-        # Store all daily graphs across all weeks
-        all_daily_graphs = []
-
-        # Pre-create all daily graphs for all weeks
-        for week_idx, week_data in enumerate(all_weeks_data):
-            # Group week data by day (24 hours per day)
-            for day in range(7):
-                start_idx = day * 24
-                end_idx = (day + 1) * 24
-                day_data = week_data.iloc[start_idx:end_idx]
-                if len(day_data) == 24:
-                    power_values = day_data["Import active power (QI+QIV)[W]"].values
-
-                    # Create line segments for this day (to be animated hour by hour)
-                    day_segments = []
-                    for hour in range(23):  # 0 to 22 (connecting to hour 23)
-                        line_segment = Line(
-                            axes.c2p(hour, power_values[hour]),
-                            axes.c2p(hour + 1, power_values[hour + 1]),
-                            color=BLUE,
-                            stroke_width=3,
-                        )
-                        line_segment.set_opacity(0)  # Start invisible
-                        day_segments.append(line_segment)
-
-                    all_daily_graphs.append(day_segments)
-
-        # Add all segments to scene
-        for day_segments in all_daily_graphs:
-            for segment in day_segments:
-                self.add(segment)
-
-        # Much faster animation - animate entire days at once with fewer calls
+        def day_polyline(values):
+            polyline = VMobject(stroke_color=BLUE, stroke_width=3)
+            polyline.set_points_as_corners(
+                [axes.c2p(hour, power) for hour, power in enumerate(values)]
+            )
+            return polyline
+
+        # Finished days live in one group; each day is dimmed once, when it
+        # joins it, so the cost per day does not grow with the days shown
+        past_days = VGroup()
+        self.add(past_days)
+
+        # The day being drawn is a partial copy of its polyline, revealed
+        # from hour 0 to 23 as the tracker runs from 0 to 1
+        progress = ValueTracker(0)
+
         base_speed = 0.05  # Faster base speed
+        min_run_time = 1 / config.frame_rate  # At least one frame per day
 
-        for day_idx, day_segments in enumerate(all_daily_graphs):
+        previous_day = None
+        for day_idx, values in enumerate(day_values):
             # Calculate exponentially faster speed
             speed_multiplier = 2.0**day_idx  # Faster exponential growth
             current_speed = max(
                 0.005, base_speed / speed_multiplier
             )  # Minimum speed limit
 
-            # Dim all previous days first (only once per day)
-            if day_idx > 0:
-                prev_animations = []
-                for prev_day_idx in range(day_idx):
-                    for prev_segment in all_daily_graphs[prev_day_idx]:
-                        prev_segment.set_opacity(0.2)  # Direct set instead of animate
-
-            # Animate current day segments in batches for speed
-            batch_size = max(
-                1, 23 // max(1, int(day_idx / 3))
-            )  # Larger batches for later days
-
-            for batch_start in range(0, 23, batch_size):
-                batch_end = min(batch_start + batch_size, 23)
-                batch_animations = []
-
-                for hour in range(batch_start, batch_end):
-                    batch_animations.append(day_segments[hour].animate.set_opacity(1))
-
-                if batch_animations:
-                    self.play(*batch_animations, run_time=current_speed)
+            # One speed step per batch of hours, with fewer, larger batches for later days
+            batch_size = max(1, 23 // max(1, int(day_idx / 3)))
+            n_batches = -(-23 // batch_size)
+
+            # Dim the previous day as it joins the finished days
+            if previous_day is not None:
+                self.remove(previous_day)
+                past_days.add(previous_day.set_stroke(opacity=0.2))
+
+            full_day = day_polyline(values)
+            current_day = full_day.copy()
+            progress.set_value(0)
+            current_day.add_updater(
+                lambda mob, full_day=full_day: mob.pointwise_become_partial(
+                    full_day, 0, progress.get_value()
+                )
+            )
+            current_day.update()
+            self.add(current_day)
+
+            self.play(
+                progress.animate.set_value(1),
+                run_time=max(min_run_time, current_speed * n_batches),
+                rate_func=linear,
+            )
+
+            # Swap the drawn copy for the static polyline
+            current_day.clear_updaters()
+            self.remove(current_day)
+            self.add(full_day)
+            previous_day = full_day
 
         # Final pause
         self.wait(0.3)
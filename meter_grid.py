@@ -0,0 +1,170 @@
+import os
+import numpy as np
+import pandas as pd
+from meter_store import METER_COL, TIME_COL, store_exists, load_meter_data
+from profile_cache import source_fingerprint
+from compact_readings import read_readings_csv
+
+# Readings of every meter of a source on one regular 30-minute grid, built
+# once per version of the source: grid_cache/grid-<fingerprint>.npz
+GRID_CACHE_DIR = 'grid_cache'
+
+# Bump whenever the way the grid is built changes
+GRID_CACHE_VERSION = 1
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+SLOT = pd.Timedelta(minutes=30)
+SLOTS_PER_DAY = 48
+
+
+class MeterGrid:
+    """Meters x slots array of mean power on a dense 30-minute grid.
+
+    values[m, s] is the mean of the readings of meter m inside slot s, NaN
+    where there are none; valid[m, s] marks the slots that have readings.
+    A grid over a memory-mapped matrix has no valid array of its own; the
+    mask of whatever is sliced is then derived from the NaNs.
+    Slot 0 starts at midnight of the first date of the source, so every
+    meter, day and hour window is a reshape or slice of the arrays: the
+    accessors below return views, never copies, unless they say otherwise.
+    """
+
+    def __init__(self, meter_ids, start, values, valid):
+        self.meter_ids = np.asarray(meter_ids)
+        self.start = pd.Timestamp(start)
+        self.values = values
+        self.valid = valid
+        self._rows = {meter_id: row for row, meter_id in enumerate(self.meter_ids)}
+
+    @property
+    def n_days(self):
+        return self.values.shape[1] // SLOTS_PER_DAY
+
+    @property
+    def times(self):
+        """Start time of every slot"""
+
+        return pd.date_range(self.start, periods=self.values.shape[1], freq=SLOT)
+
+    @property
+    def dates(self):
+        return pd.date_range(self.start, periods=self.n_days, freq='D')
+
+    def __contains__(self, meter_id):
+        return meter_id in self._rows
+
+    def row(self, meter_id):
+        if meter_id not in self._rows:
+            raise KeyError(f'Meter {meter_id} has no readings in the grid')
+        return self._rows[meter_id]
+
+    def day_number(self, date):
+        """Row of a date in the days x slots views, None when outside the grid"""
+
+        day = (pd.Timestamp(date).normalize() - self.start).days
+        return day if 0 <= day < self.n_days else None
+
+    def _valid(self, values, index):
+        return ~np.isnan(values) if self.valid is None else self.valid[index]
+
+    def meter(self, meter_id):
+        """(values, valid) of one meter over every slot"""
+
+        row = self.row(meter_id)
+        return self.values[row], self._valid(self.values[row], row)
+
+    def days(self, meter_id):
+        """(values, valid) of one meter as days x 48 slots"""
+
+        values, valid = self.meter(meter_id)
+        return values.reshape(self.n_days, SLOTS_PER_DAY), valid.reshape(self.n_days, SLOTS_PER_DAY)
+
+    def day(self, meter_id, date):
+        """(values, valid) of one meter's 48 slots on a date, None when outside the grid"""
+
+        day = self.day_number(date)
+        if day is None:
+            return None
+        values, valid = self.days(meter_id)
+        return values[day], valid[day]
+
+    def all_days(self):
+        """(values, valid) of every meter as meters x days x 48 slots"""
+
+        shape = (len(self.meter_ids), self.n_days, SLOTS_PER_DAY)
+        return self.values.reshape(shape), self._valid(self.values, slice(None)).reshape(shape)
+
+    def hourly(self, meter_id):
+        """Days x 24 hourly mean power of one meter, NaN where an hour has no readings (a copy)"""
+
+        values, valid = self.days(meter_id)
+        pairs = values.reshape(self.n_days, 24, 2)
+        counts = valid.reshape(self.n_days, 24, 2).sum(axis=2)
+        with np.errstate(invalid='ignore'):
+            return np.where(counts > 0, np.nansum(pairs, axis=2) / counts, np.nan)
+
+    def span(self, meter_id):
+        """First and last date with readings of one meter"""
+
+        has_day = self.days(meter_id)[1].any(axis=1)
+        days = np.flatnonzero(has_day)
+        if len(days) == 0:
+            raise ValueError(f'No readings for meter {meter_id} in the grid')
+        return self.dates[days[0]], self.dates[days[-1]]
+
+
+def build_grid(readings):
+    """Grid of a frame of readings; readings sharing a slot are averaged"""
+
+    readings = readings[readings[POWER_COL].notna()]
+    times = readings[TIME_COL].to_numpy(dtype='datetime64[ns]')
+    start = times.min().astype('datetime64[D]')
+    n_days = int((times.max().astype('datetime64[D]') - start) / np.timedelta64(1, 'D')) + 1
+    n_slots = n_days * SLOTS_PER_DAY
+
+    codes, meter_ids = pd.factorize(readings[METER_COL], sort=True)
+    slots = (times - start) // np.timedelta64(SLOT)
+    cells = codes * n_slots + slots
+
+    size = len(meter_ids) * n_slots
+    sums = np.bincount(cells, weights=readings[POWER_COL].to_numpy(dtype=float), minlength=size)
+    counts = np.bincount(cells, minlength=size)
+
+    valid = (counts > 0).reshape(len(meter_ids), n_slots)
+    with np.errstate(invalid='ignore'):
+        values = (sums / counts).reshape(len(meter_ids), n_slots)
+
+    return MeterGrid(np.asarray(meter_ids, dtype=str), start, values, valid)
+
+
+def _cache_path(source, cache_dir):
+    return os.path.join(cache_dir, f'grid-v{GRID_CACHE_VERSION}-{source_fingerprint(source)}.npz')
+
+
+def load_meter_grid(source=None, cache_dir=GRID_CACHE_DIR):
+    """Grid of every meter in a CSV, or in the store when source is None, built only when the source changed"""
+
+    path = _cache_path(source, cache_dir)
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return MeterGrid(cached['meter_ids'], pd.Timestamp(int(cached['start'])),
+                             cached['values'], cached['valid'])
+
+    print(f'Building 30-minute grid of {source or "the store"}...')
+    if source is None and store_exists():
+        readings = load_meter_data(columns=[POWER_COL])
+    else:
+        readings = read_readings_csv(source or 'combined_load_profile_electrical.csv',
+                                     [METER_COL, TIME_COL, POWER_COL], add_day_hour=False)
+    grid = build_grid(readings)
+
+    # Parallel renders may build the same grid; each writes its own temp file
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, meter_ids=grid.meter_ids, start=np.int64(grid.start.value),
+                 values=grid.values, valid=grid.valid)
+    os.replace(tmp_path, path)
+
+    print(f'  {len(grid.meter_ids)} meters x {grid.n_days} days, {grid.valid.mean():.1%} of slots with readings')
+    return grid
@@ -0,0 +1,70 @@
+import os
+import json
+import numpy as np
+from meter_store import STORE_DIR, METER_COL, TIME_COL, iter_meter_frames
+from day_index import _manifest_digest, load_day_index
+from meter_grid import POWER_COL, SLOT, SLOTS_PER_DAY, MeterGrid, build_grid
+
+# Meters x 30-minute slots float32 matrix of the whole store, written at ingest
+# and memory-mapped by readers, so every process shares the same pages:
+# load_profile_store/matrix.f32 (row-major, NaN where a slot has no readings)
+# load_profile_store/matrix.json (meter id of each row, time axis, manifest hash)
+MATRIX_FILENAME = 'matrix.f32'
+MATRIX_META_FILENAME = 'matrix.json'
+
+
+def build_meter_matrix(store_dir=STORE_DIR):
+    """Write the store's readings onto the matrix one meter at a time"""
+
+    day_index = load_day_index(store_dir)
+    meter_ids = [str(meter_id) for meter_id in day_index.meters]
+    if len(day_index):
+        first_day, last_day = day_index.days.min(), day_index.days.max()
+    else:
+        first_day = last_day = np.datetime64('1970-01-01', 'D').astype(np.int64)
+    n_slots = int(last_day - first_day + 1) * SLOTS_PER_DAY
+    start = np.datetime64(int(first_day), 'D')
+
+    # Readers that find the matrix stale may rebuild it concurrently; each writes its own temp files
+    matrix_path = os.path.join(store_dir, MATRIX_FILENAME)
+    tmp_suffix = f'.{os.getpid()}.tmp'
+    matrix = np.memmap(matrix_path + tmp_suffix, dtype=np.float32, mode='w+', shape=(max(len(meter_ids), 1), n_slots))
+    matrix[:] = np.nan
+
+    rows = {meter_id: row for row, meter_id in enumerate(meter_ids)}
+    for meter_id, readings in iter_meter_frames(meter_ids, [METER_COL, TIME_COL, POWER_COL], store_dir):
+        row = rows[meter_id]
+        if readings[POWER_COL].notna().any():
+            grid = build_grid(readings)
+            offset = int((grid.start.to_datetime64() - start) // np.timedelta64(SLOT))
+            matrix[row, offset:offset + grid.values.shape[1]] = grid.values[0]
+    matrix.flush()
+    del matrix
+
+    meta = {'meters': meter_ids, 'start': str(start), 'slot_minutes': int(SLOT.total_seconds() // 60),
+            'n_slots': n_slots, 'dtype': 'float32', 'manifest_sha256': _manifest_digest(store_dir)}
+    os.replace(matrix_path + tmp_suffix, matrix_path)
+    meta_path = os.path.join(store_dir, MATRIX_META_FILENAME)
+    with open(meta_path + tmp_suffix, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + tmp_suffix, meta_path)
+
+    print(f'Wrote {len(meter_ids)} meters x {n_slots:,} slots to {matrix_path}')
+
+
+def load_meter_matrix(store_dir=STORE_DIR):
+    """The store's matrix as a read-only memory-mapped MeterGrid, rebuilt when the store has changed"""
+
+    meta_path = os.path.join(store_dir, MATRIX_META_FILENAME)
+    meta = None
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+    if meta is None or meta['manifest_sha256'] != _manifest_digest(store_dir):
+        build_meter_matrix(store_dir)
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+    values = np.memmap(os.path.join(store_dir, MATRIX_FILENAME), dtype=np.float32, mode='r',
+                       shape=(max(len(meta['meters']), 1), meta['n_slots']))
+    return MeterGrid(meta['meters'], meta['start'], values[:len(meta['meters'])], None)
@@ -0,0 +1,346 @@
+import os
+import glob
+import json
+import hashlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Columnar copy of combined_load_profile_electrical.csv, laid out as
+# load_profile_store/meter=<HES Meter Id>/month=<YYYY-MM>/part-<n>.parquet
+STORE_DIR = 'load_profile_store'
+CSV_FILENAME = 'combined_load_profile_electrical.csv'
+
+MANIFEST_FILENAME = 'manifest.json'
+
+METER_COL = 'HES Meter Id'
+TIME_COL = 'Meter Datetime'
+
+# Readers return the compact layout of compact_readings.py: meter ids as a
+# categorical and the power columns as float32
+POWER_COLS = ['Import active power (QI+QIV)[W]', 'Export active power (QII+QIII)[W]']
+
+# A meter reports one reading per interval, so this pair identifies a reading
+KEY_COLS = [METER_COL, TIME_COL]
+
+
+def _meter_dir(meter_id, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f'meter={meter_id}')
+
+
+def _partition_dir(meter_id, month, store_dir=STORE_DIR):
+    return os.path.join(_meter_dir(meter_id, store_dir), f'month={month}')
+
+
+def store_exists(store_dir=STORE_DIR):
+    """Check whether the partitioned store has been built"""
+    return os.path.isdir(store_dir) and len(glob.glob(os.path.join(store_dir, 'meter=*'))) > 0
+
+
+def list_meters(store_dir=STORE_DIR):
+    """List the meter ids present in the store"""
+    meter_dirs = glob.glob(os.path.join(store_dir, 'meter=*'))
+    return sorted(os.path.basename(d).split('=', 1)[1] for d in meter_dirs)
+
+
+def write_meter_store(df, store_dir=STORE_DIR):
+    """Write readings as Parquet files partitioned by meter and month of Meter Datetime"""
+
+    print(f'Writing partitioned store to: {store_dir}')
+
+    df = df.sort_values([METER_COL, TIME_COL])
+    months = df[TIME_COL].dt.strftime('%Y-%m')
+
+    n_files = 0
+    for (meter_id, month), part in df.groupby([METER_COL, months], sort=False):
+        part_dir = _partition_dir(meter_id, month, store_dir)
+        os.makedirs(part_dir, exist_ok=True)
+
+        # A full export replaces whatever the partition held before
+        for old_file in glob.glob(os.path.join(part_dir, '*.parquet')):
+            os.remove(old_file)
+
+        part.to_parquet(os.path.join(part_dir, 'part-0.parquet'), index=False)
+        n_files += 1
+
+    print(f'  Wrote {n_files} partitions for {df[METER_COL].nunique()} meters')
+
+
+def append_to_store(df, part_name, store_dir=STORE_DIR):
+    """Add readings to the store as new part files, one per meter/month partition.
+
+    Existing parts are left untouched so several writers can append to the
+    same partition concurrently as long as they use distinct part names.
+    """
+
+    months = df[TIME_COL].dt.strftime('%Y-%m')
+
+    written = []
+    for (meter_id, month), part in df.groupby([METER_COL, months], sort=False):
+        part_dir = _partition_dir(meter_id, month, store_dir)
+        os.makedirs(part_dir, exist_ok=True)
+        part_file = os.path.join(part_dir, f'part-{part_name}.parquet')
+        part.to_parquet(part_file, index=False)
+        written.append(part_file)
+
+    return written
+
+
+def compact_partition(part_dir, sort_col='Entry Datetime'):
+    """Merge a partition's part files into one, keeping the first reading of every key.
+
+    Part files sort in ingest order, so the earliest workbook's reading wins,
+    as it does when merge_new_parts folds a later workbook into the store.
+    """
+
+    files = sorted(glob.glob(os.path.join(part_dir, '*.parquet')))
+    if not files:
+        return 0, 0
+
+    df = pq.read_table(files, partitioning=None).to_pandas()
+    before_shape = df.shape[0]
+    df = df.drop_duplicates(KEY_COLS, keep='first').sort_values(sort_col)
+
+    compacted = os.path.join(part_dir, 'part-0.parquet.tmp')
+    df.to_parquet(compacted, index=False)
+    for old_file in files:
+        os.remove(old_file)
+    os.replace(compacted, os.path.join(part_dir, 'part-0.parquet'))
+
+    return before_shape, df.shape[0]
+
+
+def compact_store(meter_ids=None, store_dir=STORE_DIR, sort_col='Entry Datetime'):
+    """Compact every partition of the given meters, one partition in memory at a time"""
+
+    if meter_ids is None:
+        meter_ids = list_meters(store_dir)
+
+    removed = 0
+    for meter_id in meter_ids:
+        for part_dir in sorted(glob.glob(os.path.join(_meter_dir(meter_id, store_dir), 'month=*'))):
+            before_rows, after_rows = compact_partition(part_dir, sort_col)
+            removed += before_rows - after_rows
+
+    return removed
+
+
+def merge_new_parts(part_dir, new_files, check_existing=True, sort_col='Entry Datetime'):
+    """Fold freshly appended part files into a partition, keeping only unseen keys.
+
+    New rows are deduplicated among themselves (the first of new_files, in
+    ingest order, wins) and, when check_existing is set, against the keys
+    already stored in the partition. Only the key columns of existing parts
+    are read. Returns the rows that were added.
+    """
+
+    new_files = list(new_files)
+    new_df = pq.read_table(new_files, partitioning=None).to_pandas()
+    new_df = new_df.drop_duplicates(KEY_COLS, keep='first')
+
+    existing_files = sorted(set(glob.glob(os.path.join(part_dir, '*.parquet'))) - set(new_files))
+    if check_existing and existing_files:
+        existing_keys = pq.read_table(existing_files, columns=KEY_COLS, partitioning=None).to_pandas()
+        seen = pd.MultiIndex.from_frame(existing_keys).unique()
+        new_df = new_df[~pd.MultiIndex.from_frame(new_df[KEY_COLS]).isin(seen)]
+
+    new_df = new_df.sort_values(sort_col)
+
+    # Replace the raw parts with a single part holding just the new rows
+    merged = new_files[0] + '.tmp'
+    if len(new_df) > 0:
+        new_df.to_parquet(merged, index=False)
+    for new_file in new_files:
+        os.remove(new_file)
+    if len(new_df) > 0:
+        os.replace(merged, new_files[0])
+
+    return new_df
+
+
+def load_manifest(store_dir=STORE_DIR):
+    """Read the manifest of ingested files and per-meter high-water marks"""
+
+    manifest_path = os.path.join(store_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {'files': {}, 'high_water': {}}
+
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, store_dir=STORE_DIR):
+    """Write the manifest atomically so an interrupted run never leaves it half written"""
+
+    os.makedirs(store_dir, exist_ok=True)
+    manifest_path = os.path.join(store_dir, MANIFEST_FILENAME)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+def file_sha256(filename, block_size=1 << 20):
+    """Content hash of an input file"""
+
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_manifest_entry(filename, manifest=None):
+    """Describe a file for the manifest, reusing the stored hash when size and mtime are unchanged"""
+
+    stat = os.stat(filename)
+    entry = {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    known = (manifest or {}).get('files', {}).get(os.path.basename(filename))
+    if known and known['size'] == entry['size'] and known['mtime'] == entry['mtime']:
+        entry['sha256'] = known['sha256']
+    else:
+        entry['sha256'] = file_sha256(filename)
+
+    return entry
+
+
+def is_ingested(entry, manifest):
+    """Check whether a file with the same content has already been ingested"""
+
+    return any(known['sha256'] == entry['sha256'] for known in manifest['files'].values())
+
+
+def record_ingested(manifest, filename, entry, rows):
+    """Add an ingested file to the manifest"""
+
+    manifest['files'][os.path.basename(filename)] = dict(
+        entry, rows=int(rows), ingested_at=datetime.now().isoformat(timespec='seconds'))
+
+
+def update_high_water(manifest, high_water):
+    """Advance the per-meter high-water marks of Meter Datetime"""
+
+    for meter_id, latest in high_water.items():
+        latest = pd.Timestamp(latest).isoformat()
+        if latest > manifest['high_water'].get(meter_id, ''):
+            manifest['high_water'][meter_id] = latest
+
+
+def _compact_dtypes(df):
+    """Categorical meter ids and float32 power, in place"""
+
+    if METER_COL in df.columns and not isinstance(df[METER_COL].dtype, pd.CategoricalDtype):
+        df[METER_COL] = df[METER_COL].astype('category')
+    for col in POWER_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def iter_meter_frames(meter_ids=None, columns=None, store_dir=STORE_DIR):
+    """Yield (meter_id, readings) one meter at a time"""
+
+    if meter_ids is None:
+        meter_ids = list_meters(store_dir)
+
+    for meter_id in meter_ids:
+        files = _partition_files([meter_id], store_dir=store_dir)
+        if files:
+            yield meter_id, _compact_dtypes(pq.read_table(files, columns=columns, partitioning=None).to_pandas())
+
+
+def _partition_files(meter_ids=None, start=None, end=None, store_dir=STORE_DIR):
+    """Collect the Parquet files whose meter/month partition can overlap the request"""
+
+    if meter_ids is None:
+        meter_ids = list_meters(store_dir)
+
+    start_month = start.strftime('%Y-%m') if start is not None else None
+    end_month = end.strftime('%Y-%m') if end is not None else None
+
+    files = []
+    for meter_id in meter_ids:
+        for part_dir in sorted(glob.glob(os.path.join(_meter_dir(meter_id, store_dir), 'month=*'))):
+            month = os.path.basename(part_dir).split('=', 1)[1]
+            if start_month is not None and month < start_month:
+                continue
+            if end_month is not None and month > end_month:
+                continue
+            files.extend(sorted(glob.glob(os.path.join(part_dir, '*.parquet'))))
+
+    return files
+
+
+def _load_from_csv(meter_ids, start, end, columns, csv_filename=CSV_FILENAME):
+    """Fallback for trees where the store has not been built yet"""
+
+    print(f'Store not found, scanning {csv_filename} instead...')
+
+    chunks = []
+    for chunk in pd.read_csv(csv_filename, usecols=columns, chunksize=100000):
+        if meter_ids is not None:
+            chunk = chunk[chunk[METER_COL].isin(meter_ids)]
+        chunk[TIME_COL] = pd.to_datetime(chunk[TIME_COL])
+        if start is not None:
+            chunk = chunk[chunk[TIME_COL] >= start]
+        if end is not None:
+            chunk = chunk[chunk[TIME_COL] < end]
+        chunks.append(chunk)
+
+    return _compact_dtypes(pd.concat(chunks, ignore_index=True))
+
+
+def _empty_frame(columns, store_dir=STORE_DIR):
+    """Zero-row frame with the store's column dtypes, for requests no partition can match"""
+
+    sample = sorted(glob.glob(os.path.join(store_dir, 'meter=*', 'month=*', '*.parquet')))[:1]
+    table = pq.read_schema(sample[0]).empty_table()
+    return _compact_dtypes(table.select(columns if columns is not None else table.column_names).to_pandas())
+
+
+def load_meter_data(meter_ids=None, start=None, end=None, columns=None, store_dir=STORE_DIR):
+    """Load readings for the given meters and [start, end) Meter Datetime range.
+
+    Only the meter/month partitions that can hold matching rows are opened,
+    and only the requested columns are read.
+    """
+
+    if isinstance(meter_ids, str):
+        meter_ids = [meter_ids]
+    if start is not None:
+        start = pd.Timestamp(start)
+    if end is not None:
+        end = pd.Timestamp(end)
+
+    if columns is not None:
+        # The filter and sort keys always have to be read
+        columns = list(dict.fromkeys([METER_COL, TIME_COL] + list(columns)))
+
+    if not store_exists(store_dir):
+        df = _load_from_csv(meter_ids, start, end, columns)
+        return df.sort_values([METER_COL, TIME_COL]).reset_index(drop=True)
+
+    files = _partition_files(meter_ids, start, end, store_dir)
+    if not files:
+        return _empty_frame(columns, store_dir)
+
+    filters = []
+    if start is not None:
+        filters.append((TIME_COL, '>=', start))
+    if end is not None:
+        filters.append((TIME_COL, '<', end))
+
+    table = pq.read_table(files, columns=columns, filters=filters or None, partitioning=None)
+    df = _compact_dtypes(table.to_pandas())
+
+    return df.sort_values([METER_COL, TIME_COL]).reset_index(drop=True)
+
+
+def load_meter_day(meter_id, target_date, columns=None, store_dir=STORE_DIR):
+    """Load one meter's readings from 12 AM to 12 AM next day"""
+
+    start = pd.Timestamp(target_date).normalize()
+    end = start + pd.Timedelta(days=1)
+
+    return load_meter_data([meter_id], start, end, columns, store_dir)
@@ -5,49 +5,118 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime, timedelta
+from meter_store import load_meter_day
 import warnings
 warnings.filterwarnings('ignore')
 
+# Night hours for highlighting (9 PM to 4 AM)
+NIGHT_HOURS = list(range(21, 24)) + list(range(0, 5))
+
+FIGSIZE = (16, 8)
+SAVEFIG_KWARGS = dict(dpi=300, bbox_inches='tight')
+
+def output_filename(meter_id, target_date):
+    return f'24hour_consumption_{meter_id}_{target_date.replace("-", "_")}.png'
+
 def plot_24hour_consumption(meter_id='AES2020896472402', target_date='2023-05-10'):
     """Plot 24-hour consumption from 12 AM to 12 AM next day"""
     
     print(f"Loading 24-hour data for meter {meter_id} on {target_date}...")
     
-    # Load the combined data
-    df = pd.read_csv('combined_load_profile_electrical.csv')
-    df['Meter Datetime'] = pd.to_datetime(df['Meter Datetime'])
-    df['Hour'] = df['Meter Datetime'].dt.hour
-    df['Date'] = df['Meter Datetime'].dt.date
-    
-    # Convert target date to date object
-    target_date_obj = pd.to_datetime(target_date).date()
-    
-    # Filter for specific meter and date
-    meter_data = df[df['HES Meter Id'] == meter_id]
-    day_data = meter_data[meter_data['Date'] == target_date_obj].copy()
+    # Load only this meter's readings for the day from the partitioned store
+    day_data = load_meter_day(meter_id, target_date)
     
     if len(day_data) == 0:
         print(f"No data found for meter {meter_id} on {target_date}")
         return None
     
+    day_data['Hour'] = day_data['Meter Datetime'].dt.hour
+    
     # Sort by time
     day_data = day_data.sort_values('Meter Datetime')
     
     print(f"Found {len(day_data)} records for {target_date}")
     
     # Create a clean 24-hour plot
-    fig, ax = plt.subplots(1, 1, figsize=(16, 8))
+    fig, ax = plt.subplots(1, 1, figsize=FIGSIZE)
+    draw_24hour_consumption(ax, day_data, meter_id, target_date)
+    stats = daily_statistics(day_data)
+    
+    # Adjust layout
+    fig.tight_layout()
+    
+    # Save the plot
+    filename = output_filename(meter_id, target_date)
+    fig.savefig(filename, **SAVEFIG_KWARGS)
+    plt.close(fig)
     
-    # Define night hours for highlighting (9 PM to 4 AM)
-    night_hours = list(range(21, 24)) + list(range(0, 5))
+    print(f"24-hour consumption plot saved as: {filename}")
+    
+    avg_consumption = stats['avg']
+    max_consumption = stats['max']
+    min_consumption = stats['min']
+    day_avg = stats['day_avg']
+    night_avg = stats['night_avg']
+    peak_time = stats['peak_time']
+    
+    # Print summary
+    print(f"\n24-HOUR CONSUMPTION SUMMARY:")
+    print(f"Date: {target_date} (12:00 AM to 12:00 AM next day)")
+    print(f"Average consumption: {avg_consumption:.0f} W")
+    print(f"Peak: {max_consumption:.0f} W at {peak_time.strftime('%H:%M')}")
+    print(f"Minimum: {min_consumption:.0f} W")
+    print(f"Day period average: {day_avg:.0f} W")
+    print(f"Night period average: {night_avg:.0f} W")
+    print(f"Night/Day ratio: {night_avg/day_avg:.2f}")
+    
+    if night_avg > day_avg:
+        print("⚠️  ANOMALY: Night consumption exceeds day consumption!")
+    
+    return day_data
+
+def daily_statistics(day_data):
+    """Average/max/min, day and night averages and peak time of one day's readings"""
+    
+    night_mask = day_data['Hour'].isin(NIGHT_HOURS)
+    consumption_values = day_data['Import active power (QI+QIV)[W]']
+    night_consumption = consumption_values[night_mask] if night_mask.any() else pd.Series([0])
+    day_consumption = consumption_values[~night_mask]
+    
+    return {'avg': consumption_values.mean(),
+            'max': consumption_values.max(),
+            'min': consumption_values.min(),
+            'night_avg': night_consumption.mean() if len(night_consumption) > 0 else 0,
+            'day_avg': day_consumption.mean() if len(day_consumption) > 0 else 0,
+            # Find peak time
+            'peak_time': day_data.loc[consumption_values.idxmax(), 'Meter Datetime']}
+
+def statistics_text(stats):
+    return f"""Daily Statistics:
+Average: {stats['avg']:.0f} W
+Maximum: {stats['max']:.0f} W (at {stats['peak_time'].strftime('%H:%M')})
+Minimum: {stats['min']:.0f} W
+Day Avg: {stats['day_avg']:.0f} W
+Night Avg: {stats['night_avg']:.0f} W
+Night/Day Ratio: {stats['night_avg']/stats['day_avg']:.2f}"""
+
+def chart_title(meter_id, target_date):
+    return f'24-Hour Power Consumption - Meter {meter_id}\n{target_date} (12:00 AM to 12:00 AM next day)'
+
+def draw_24hour_consumption(ax, day_data, meter_id, target_date):
+    """Draw one day's 24-hour chart onto existing axes and return the artists that hold its data.
+    
+    day_data needs the Meter Datetime, import power and Hour columns, sorted by time.
+    """
+    
+    night_hours = NIGHT_HOURS
     
     # Create time axis starting from midnight
     start_time = pd.to_datetime(f"{target_date} 00:00:00")
     end_time = start_time + timedelta(days=1)
     
     # Plot the main consumption line
-    ax.plot(day_data['Meter Datetime'], day_data['Import active power (QI+QIV)[W]'], 
-             'b-', linewidth=2.5, alpha=0.8, label='Power Consumption')
+    line, = ax.plot(day_data['Meter Datetime'], day_data['Import active power (QI+QIV)[W]'], 
+                    'b-', linewidth=2.5, alpha=0.8, label='Power Consumption')
     
     # Highlight nighttime periods with background shading
     for hour in night_hours:
@@ -67,13 +136,13 @@ def plot_24hour_consumption(meter_id='AES2020896472402', target_date='2023-05-10
     
     # Highlight nighttime data points
     night_data = day_data[day_data['Hour'].isin(night_hours)]
+    night_points = None
     if len(night_data) > 0:
-        ax.scatter(night_data['Meter Datetime'], night_data['Import active power (QI+QIV)[W]'], 
-                   color='red', alpha=0.8, s=40, zorder=5, label='Night Consumption Points')
+        night_points = ax.scatter(night_data['Meter Datetime'], night_data['Import active power (QI+QIV)[W]'], 
+                                  color='red', alpha=0.8, s=40, zorder=5, label='Night Consumption Points')
     
     # Set title and labels
-    ax.set_title(f'24-Hour Power Consumption - Meter {meter_id}\n{target_date} (12:00 AM to 12:00 AM next day)', 
-                 fontsize=16, fontweight='bold', pad=20)
+    title = ax.set_title(chart_title(meter_id, target_date), fontsize=16, fontweight='bold', pad=20)
     ax.set_xlabel('Time of Day', fontsize=14)
     ax.set_ylabel('Power Consumption (W)', fontsize=14)
     
@@ -98,63 +167,51 @@ def plot_24hour_consumption(meter_id='AES2020896472402', target_date='2023-05-10
     ax.legend(by_label.values(), by_label.keys(), loc='upper right', fontsize=12)
     
     # Add text box with key statistics
-    consumption_values = day_data['Import active power (QI+QIV)[W]']
-    night_consumption = night_data['Import active power (QI+QIV)[W]'] if len(night_data) > 0 else pd.Series([0])
-    day_consumption = day_data[~day_data['Hour'].isin(night_hours)]['Import active power (QI+QIV)[W]']
-    
-    avg_consumption = consumption_values.mean()
-    max_consumption = consumption_values.max()
-    min_consumption = consumption_values.min()
-    night_avg = night_consumption.mean() if len(night_consumption) > 0 else 0
-    day_avg = day_consumption.mean() if len(day_consumption) > 0 else 0
-    
-    # Find peak time
-    peak_time = day_data.loc[day_data['Import active power (QI+QIV)[W]'].idxmax(), 'Meter Datetime']
-    
-    stats_text = f"""Daily Statistics:
-Average: {avg_consumption:.0f} W
-Maximum: {max_consumption:.0f} W (at {peak_time.strftime('%H:%M')})
-Minimum: {min_consumption:.0f} W
-Day Avg: {day_avg:.0f} W
-Night Avg: {night_avg:.0f} W
-Night/Day Ratio: {night_avg/day_avg:.2f}"""
+    stats = daily_statistics(day_data)
+    stats_text = statistics_text(stats)
     
     # Add text box
-    ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, fontsize=11,
-            verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', 
-            facecolor='lightblue', alpha=0.8), fontfamily='monospace')
+    stats_box = ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, fontsize=11,
+                        verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', 
+                        facecolor='lightblue', alpha=0.8), fontfamily='monospace')
     
     # Rotate x-axis labels for better readability
     plt.setp(ax.xaxis.get_majorticklabels(), rotation=0, ha='center')
     
     # Add horizontal lines for reference
-    ax.axhline(y=avg_consumption, color='orange', linestyle='--', alpha=0.7, 
-               linewidth=1.5, label=f'Daily Average ({avg_consumption:.0f}W)')
+    average_line = ax.axhline(y=stats['avg'], color='orange', linestyle='--', alpha=0.7, 
+                              linewidth=1.5, label=f'Daily Average ({stats["avg"]:.0f}W)')
     
-    # Adjust layout
-    plt.tight_layout()
+    return {'line': line, 'night_points': night_points, 'title': title, 'stats_box': stats_box,
+            'average_line': average_line}
+
+def update_24hour_consumption(ax, artists, day_data, meter_id, target_date):
+    """Point the artists of an already drawn chart at another day's readings.
     
-    # Save the plot
-    filename = f'24hour_consumption_{meter_id}_{target_date.replace("-", "_")}.png'
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
-    plt.close()
+    The readings must already be placed on the drawn day's time axis. Returns
+    False when the chart cannot be updated in place (the night points had no
+    artist to reuse), in which case it has to be drawn again.
+    """
     
-    print(f"24-hour consumption plot saved as: {filename}")
+    night_data = day_data[day_data['Hour'].isin(NIGHT_HOURS)]
+    if (artists['night_points'] is None) != (len(night_data) == 0):
+        return False
     
-    # Print summary
-    print(f"\n24-HOUR CONSUMPTION SUMMARY:")
-    print(f"Date: {target_date} (12:00 AM to 12:00 AM next day)")
-    print(f"Average consumption: {avg_consumption:.0f} W")
-    print(f"Peak: {max_consumption:.0f} W at {peak_time.strftime('%H:%M')}")
-    print(f"Minimum: {min_consumption:.0f} W")
-    print(f"Day period average: {day_avg:.0f} W")
-    print(f"Night period average: {night_avg:.0f} W")
-    print(f"Night/Day ratio: {night_avg/day_avg:.2f}")
+    power = day_data['Import active power (QI+QIV)[W]']
+    artists['line'].set_data(day_data['Meter Datetime'], power)
+    if artists['night_points'] is not None:
+        artists['night_points'].set_offsets(np.column_stack([
+            mdates.date2num(night_data['Meter Datetime']), night_data['Import active power (QI+QIV)[W]']]))
     
-    if night_avg > day_avg:
-        print("⚠️  ANOMALY: Night consumption exceeds day consumption!")
+    stats = daily_statistics(day_data)
+    artists['title'].set_text(chart_title(meter_id, target_date))
+    artists['stats_box'].set_text(statistics_text(stats))
+    artists['average_line'].set_ydata([stats['avg'], stats['avg']])
     
-    return day_data
+    ax.relim()
+    ax.autoscale_view(scalex=False)
+    
+    return True
 
 if __name__ == "__main__":
     # Generate the 24-hour consumption plot
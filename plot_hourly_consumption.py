@@ -1,75 +1,76 @@
-import pandas as pd
+import time
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy import interpolate
-from datetime import datetime
+from scipy.interpolate import CubicSpline
+from matplotlib.collections import LineCollection
 import seaborn as sns
+from meter_grid import load_meter_grid
+
+SLOT_HOURS = np.arange(48) / 2
+SMOOTH_HOURS = np.linspace(0, 23.5, 100)
+
+# Days need more than this many half-hour readings to be drawn
+MIN_READINGS = 5
+
+
+def fill_gaps(values):
+    """Fill the NaN slots of every row by linear interpolation between its nearest readings,
+    holding the first/last reading towards the ends of the day"""
+
+    valid = ~np.isnan(values)
+    slots = np.arange(values.shape[1])
+    rows = np.arange(values.shape[0])[:, None]
+
+    # Index of the previous and next valid slot of every slot, per row
+    prev = np.maximum.accumulate(np.where(valid, slots, -1), axis=1)
+    next_ = np.minimum.accumulate(np.where(valid, slots, values.shape[1])[:, ::-1], axis=1)[:, ::-1]
+    prev_known = np.where(prev >= 0, prev, next_)
+    next_known = np.where(next_ < values.shape[1], next_, prev)
+
+    left = values[rows, prev_known]
+    right = values[rows, next_known]
+    span = np.where(next_known > prev_known, next_known - prev_known, 1)
+    weight = np.clip((slots - prev_known) / span, 0, 1)
+    return np.where(valid, values, left + (right - left) * weight)
+
+
+def smooth_days(values):
+    """Cubic spline through the 48 slots of every row at once, evaluated at SMOOTH_HOURS"""
+
+    return CubicSpline(SLOT_HOURS, fill_gaps(values), axis=1)(SMOOTH_HOURS)
+
 
 # Set style for professional appearance
 plt.style.use('seaborn-v0_8-white')
 sns.set_palette("husl")
 
-# Read the CSV file
-df = pd.read_csv('cleaned_meter_KFM2020660190982.csv')
+# Half-hourly day profiles are views of the meter's row of the 30-minute grid, built once per version of the CSV
+grid = load_meter_grid('cleaned_meter_KFM2020660190982.csv')
+day_values, day_valid = grid.days('KFM2020660190982')
+readings_per_day = day_valid.sum(axis=1)
 
-# Convert datetime column to datetime type
-df['Meter Datetime'] = pd.to_datetime(df['Meter Datetime'])
+start = time.perf_counter()
 
-# Extract hour and date
-df['Hour'] = df['Meter Datetime'].dt.hour + df['Meter Datetime'].dt.minute/60
-df['Date'] = df['Meter Datetime'].dt.date
+# Every day with enough readings, plus the average daily pattern as the last row, in one spline
+shown = day_values[readings_per_day > MIN_READINGS]
+with np.errstate(invalid='ignore'):
+    average = np.nanmean(day_values[readings_per_day > 0], axis=0)
+smoothed = smooth_days(np.vstack([shown, average]))
+day_curves, average_curve = smoothed[:-1], smoothed[-1]
 
-# Group by date and hour, taking mean of power consumption for each hour
-hourly_data = df.groupby(['Date', 'Hour'])['Import active power (QI+QIV)[W]'].mean().reset_index()
+compute_time = time.perf_counter() - start
 
 # Create the plot
 fig, ax = plt.subplots(figsize=(14, 8))
 
-# Get unique dates
-unique_dates = hourly_data['Date'].unique()
-
-# Sample a subset of dates for better visualization (every 7th day to avoid overcrowding)
-sample_dates = unique_dates[::7]
-
-# Plot each day with transparency and smoothing
-for i, date in enumerate(sample_dates):
-    day_data = hourly_data[hourly_data['Date'] == date]
-    
-    if len(day_data) > 5:  # Only plot if we have sufficient data points
-        hours = day_data['Hour'].values
-        power = day_data['Import active power (QI+QIV)[W]'].values
-        
-        # Create smooth curve using interpolation
-        if len(hours) > 3:
-            # Sort by hour to ensure proper interpolation
-            sorted_indices = np.argsort(hours)
-            hours_sorted = hours[sorted_indices]
-            power_sorted = power[sorted_indices]
-            
-            # Create interpolation function
-            f = interpolate.interp1d(hours_sorted, power_sorted, kind='cubic', 
-                                   bounds_error=False, fill_value='extrapolate')
-            
-            # Generate smooth curve
-            hours_smooth = np.linspace(0, 23.5, 100)
-            power_smooth = f(hours_smooth)
-            
-            # Plot the smooth curve
-            ax.plot(hours_smooth, power_smooth, color='gray', alpha=0.3, linewidth=1.5)
-
-# Calculate and plot the average daily pattern
-avg_hourly = hourly_data.groupby('Hour')['Import active power (QI+QIV)[W]'].mean()
-hours_avg = avg_hourly.index.values
-power_avg = avg_hourly.values
-
-# Smooth the average curve
-f_avg = interpolate.interp1d(hours_avg, power_avg, kind='cubic', 
-                           bounds_error=False, fill_value='extrapolate')
-hours_avg_smooth = np.linspace(0, 23.5, 100)
-power_avg_smooth = f_avg(hours_avg_smooth)
+# All days as one collection; fainter the more days overlap
+segments = np.stack([np.broadcast_to(SMOOTH_HOURS, day_curves.shape), day_curves], axis=2)
+ax.add_collection(LineCollection(segments, colors='gray', alpha=min(0.3, 8 / max(len(day_curves), 1)),
+                                 linewidths=1.5))
 
 # Plot average pattern with emphasis
-ax.plot(hours_avg_smooth, power_avg_smooth, color='red', linewidth=3, alpha=0.8)
+ax.plot(SMOOTH_HOURS, average_curve, color='red', linewidth=3, alpha=0.8)
+ax.autoscale_view(scalex=False)
 
 # Customize the plot
 ax.set_xlabel('Hour of Day', fontsize=12, fontweight='bold')
@@ -87,4 +88,5 @@ plt.savefig('hourly_consumption_pattern.png', dpi=300, bbox_inches='tight')
 plt.show()
 
 print("Plot saved as 'hourly_consumption_pattern.png'")
-print(f"Processed {len(unique_dates)} days of data from {len(sample_dates)} sampled days shown")
\ No newline at end of file
+print(f"Processed {(readings_per_day > 0).sum()} days of data, all {len(day_curves)} days with enough readings shown "
+      f"(smoothing took {compute_time * 1000:.1f} ms)")
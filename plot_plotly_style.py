@@ -6,81 +6,123 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime, timedelta
+from meter_store import load_meter_day
 import warnings
 
 warnings.filterwarnings("ignore")
 
+# Plotly-like colors and styling
+PLOTLY_BG = "#e5ecf6"
+PLOTLY_GRID = "#E5E5E5"
+PLOTLY_TEXT = "#2A3F5F"
+PLOTLY_LINE = "#636EFA"  # Plotly's default blue
+
+FIGSIZE = (14, 8)
+SAVEFIG_KWARGS = dict(
+    dpi=300,
+    bbox_inches="tight",
+    facecolor=PLOTLY_BG,
+    edgecolor="none",
+    pad_inches=0.2,
+)
+
+# Plotly-style font settings
+STYLE_RC = {
+    "font.family": "sans-serif",
+    "font.sans-serif": ["Arial", "DejaVu Sans", "Liberation Sans"],
+}
+
+
+def output_filename(meter_id, target_date):
+    return f"plotly_style_24hour_{meter_id}_{target_date.replace('-', '_')}.png"
+
 
 def plot_plotly_style_24hour(meter_id="AES2020896472402", target_date="2023-05-10"):
     """Plot 24-hour consumption with Plotly-style theme"""
 
     print(f"Loading 24-hour data for meter {meter_id} on {target_date}...")
 
-    # Load the combined data
-    df = pd.read_csv("combined_load_profile_electrical.csv")
-    df["Meter Datetime"] = pd.to_datetime(df["Meter Datetime"])
-    df["Hour"] = df["Meter Datetime"].dt.hour
-    df["Date"] = df["Meter Datetime"].dt.date
-
-    # Convert target date to date object
-    target_date_obj = pd.to_datetime(target_date).date()
-
-    # Filter for specific meter and date
-    meter_data = df[df["HES Meter Id"] == meter_id]
-    day_data = meter_data[meter_data["Date"] == target_date_obj].copy()
+    # Load only this meter's readings for the day from the partitioned store
+    day_data = load_meter_day(meter_id, target_date)
 
     if len(day_data) == 0:
         print(f"No data found for meter {meter_id} on {target_date}")
         return None
 
+    day_data["Hour"] = day_data["Meter Datetime"].dt.hour
+
     # Sort by time
     day_data = day_data.sort_values("Meter Datetime")
 
     print(f"Found {len(day_data)} records for {target_date}")
 
     # Create figure with Plotly-style settings
-    fig, ax = plt.subplots(figsize=(14, 8))
+    plt.rcParams.update(STYLE_RC)
+    fig, ax = plt.subplots(figsize=FIGSIZE)
+    draw_plotly_style_24hour(ax, day_data, meter_id, target_date)
+
+    # Adjust layout
+    fig.tight_layout()
+
+    # Save the plot with high quality
+    filename = output_filename(meter_id, target_date)
+    fig.savefig(filename, **SAVEFIG_KWARGS)
+    plt.close(fig)
+
+    print(f"Plotly-style 24-hour consumption plot saved as: {filename}")
+
+    # Print basic summary
+    consumption_values = day_data["Import active power (QI+QIV)[W]"]
+    avg_consumption = consumption_values.mean()
+    max_consumption = consumption_values.max()
+    min_consumption = consumption_values.min()
+
+    print(f"\\nConsumption Summary for {target_date}:")
+    print(f"Average: {avg_consumption:,.0f} W")
+    print(f"Maximum: {max_consumption:,.0f} W")
+    print(f"Minimum: {min_consumption:,.0f} W")
+
+    return day_data
+
 
-    # Set Plotly-like colors and styling
-    plotly_bg = "#e5ecf6"
-    plotly_grid = "#E5E5E5"
-    plotly_text = "#2A3F5F"
-    plotly_line = "#636EFA"  # Plotly's default blue
+def draw_plotly_style_24hour(ax, day_data, meter_id, target_date):
+    """Draw one day's Plotly-style chart onto existing axes created under STYLE_RC
+    and return its data artists"""
 
     # Set figure and axes background
-    fig.patch.set_facecolor(plotly_bg)
-    ax.set_facecolor(plotly_bg)
+    ax.figure.patch.set_facecolor(PLOTLY_BG)
+    ax.set_facecolor(PLOTLY_BG)
 
     # Create time axis starting from midnight
     start_time = pd.to_datetime(f"{target_date} 00:00:00")
     end_time = start_time + timedelta(days=1)
 
     # Plot the main consumption line with Plotly-style
-    ax.plot(
+    (line,) = ax.plot(
         day_data["Meter Datetime"],
         day_data["Import active power (QI+QIV)[W]"],
         linewidth=2.5,
         alpha=0.95,
-        color=plotly_line,
+        color=PLOTLY_LINE,
         marker="o",
         markersize=3,
-        markerfacecolor=plotly_line,
+        markerfacecolor=PLOTLY_LINE,
         markeredgewidth=0,
         markevery=2,
     )  # Add subtle markers
 
     # Set title and labels with Plotly-style typography
-    ax.set_title(
+    title = ax.set_title(
         f"24-Hour Power Consumption - Meter {meter_id}\\n{target_date}",
         fontsize=18,
         fontweight="600",
         pad=25,
-        color=plotly_text,
+        color=PLOTLY_TEXT,
         fontfamily="sans-serif",
     )
-    ax.set_xlabel("Time of Day", fontsize=14, color=plotly_text, fontweight="500")
+    ax.set_xlabel("Time of Day", fontsize=14, color=PLOTLY_TEXT, fontweight="500")
     ax.set_ylabel(
-        "Power Consumption (W)", fontsize=14, color=plotly_text, fontweight="500"
+        "Power Consumption (W)", fontsize=14, color=PLOTLY_TEXT, fontweight="500"
     )
 
     # Format x-axis to show hours from 0 to 24
@@ -95,10 +137,10 @@ def plot_plotly_style_24hour(meter_id="AES2020896472402", target_date="2023-05-1
 
     # Plotly-style grid
     ax.grid(
-        True, which="major", alpha=0.6, linestyle="-", linewidth=0.8, color=plotly_grid
+        True, which="major", alpha=0.6, linestyle="-", linewidth=0.8, color=PLOTLY_GRID
     )
     ax.grid(
-        True, which="minor", alpha=0.3, linestyle="-", linewidth=0.4, color=plotly_grid
+        True, which="minor", alpha=0.3, linestyle="-", linewidth=0.4, color=PLOTLY_GRID
     )
 
     # Remove all spines (Plotly doesn't show axis lines)
@@ -106,7 +148,7 @@ def plot_plotly_style_24hour(meter_id="AES2020896472402", target_date="2023-05-1
         spine.set_visible(False)
 
     # Style the ticks (Plotly-style)
-    ax.tick_params(colors=plotly_text, which="both", labelsize=12)
+    ax.tick_params(colors=PLOTLY_TEXT, which="both", labelsize=12)
     ax.tick_params(axis="both", which="major", length=0)  # Remove tick marks
     ax.tick_params(axis="both", which="minor", length=0)
 
@@ -118,7 +160,7 @@ def plot_plotly_style_24hour(meter_id="AES2020896472402", target_date="2023-05-1
             1,
             transform=ax.transAxes,
             fill=False,
-            edgecolor=plotly_grid,
+            edgecolor=PLOTLY_GRID,
             linewidth=1,
         )
     )
@@ -134,39 +176,19 @@ def plot_plotly_style_24hour(meter_id="AES2020896472402", target_date="2023-05-1
     # Add hover-like effect with better spacing
     ax.margins(x=0.01, y=0.05)
 
-    # Plotly-style font settings
-    plt.rcParams["font.family"] = "sans-serif"
-    plt.rcParams["font.sans-serif"] = ["Arial", "DejaVu Sans", "Liberation Sans"]
-
-    # Adjust layout
-    plt.tight_layout()
-
-    # Save the plot with high quality
-    filename = f"plotly_style_24hour_{meter_id}_{target_date.replace('-', '_')}.png"
-    plt.savefig(
-        filename,
-        dpi=300,
-        bbox_inches="tight",
-        facecolor=plotly_bg,
-        edgecolor="none",
-        pad_inches=0.2,
-    )
-    plt.close()
+    return {"line": line, "title": title}
 
-    print(f"Plotly-style 24-hour consumption plot saved as: {filename}")
 
-    # Print basic summary
-    consumption_values = day_data["Import active power (QI+QIV)[W]"]
-    avg_consumption = consumption_values.mean()
-    max_consumption = consumption_values.max()
-    min_consumption = consumption_values.min()
+def update_plotly_style_24hour(ax, artists, day_data, meter_id, target_date):
+    """Point the artists of an already drawn chart at another day's readings,
+    already placed on the drawn day's time axis"""
 
-    print(f"\\nConsumption Summary for {target_date}:")
-    print(f"Average: {avg_consumption:,.0f} W")
-    print(f"Maximum: {max_consumption:,.0f} W")
-    print(f"Minimum: {min_consumption:,.0f} W")
+    power = day_data["Import active power (QI+QIV)[W]"]
+    artists["line"].set_data(day_data["Meter Datetime"], power)
+    artists["title"].set_text(f"24-Hour Power Consumption - Meter {meter_id}\\n{target_date}")
+    ax.set_ylim(0, power.max() * 1.1)
 
-    return day_data
+    return True
 
 
 if __name__ == "__main__":
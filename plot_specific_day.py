@@ -3,8 +3,10 @@ import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, date
+from meter_store import store_exists, load_meter_data, load_meter_day
+from day_index import load_day_index
+from energy import interval_energy
+from compact_readings import day_numbers, day_dates
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -13,45 +15,49 @@ def plot_meter_specific_day(meter_id='AES2020896472402', target_date='2023-05-10
     
     print(f"Loading data for meter {meter_id} on {target_date}...")
     
-    # Load the combined data
-    df = pd.read_csv('combined_load_profile_electrical.csv')
-    df['Meter Datetime'] = pd.to_datetime(df['Meter Datetime'])
-    df['Hour'] = df['Meter Datetime'].dt.hour
-    df['Date'] = df['Meter Datetime'].dt.date
-    
-    # Convert target date to date object
-    target_date_obj = pd.to_datetime(target_date).date()
-    
-    # Filter for specific meter and date
-    meter_data = df[df['HES Meter Id'] == meter_id]
-    day_data = meter_data[meter_data['Date'] == target_date_obj].copy()
+    if store_exists():
+        # Exact day and nearest-day lookups are binary searches on the store's day index
+        day_index = load_day_index()
+        day_data = day_index.load_day(meter_id, target_date)
+    else:
+        day_index = None
+        day_data = load_meter_day(meter_id, target_date)
     
     if len(day_data) == 0:
         print(f"No data found for meter {meter_id} on {target_date}")
-        # Let's check what dates are available for this meter
-        print("Available dates for this meter:")
-        available_dates = meter_data['Date'].unique()
-        available_dates = sorted(available_dates)
-        print(f"Date range: {available_dates[0]} to {available_dates[-1]}")
-        print(f"Total available dates: {len(available_dates)}")
-        
-        # Show some dates around the target date
         target_date_pd = pd.to_datetime(target_date).date()
-        nearby_dates = [d for d in available_dates if abs((d - target_date_pd).days) <= 7]
-        if nearby_dates:
-            print(f"Dates within 7 days of {target_date}: {nearby_dates}")
-            # Use the closest available date
-            closest_date = min(nearby_dates, key=lambda x: abs((x - target_date_pd).days))
+        if day_index is not None:
+            closest_date = day_index.nearest_date(meter_id, target_date_pd, max_days=7)
+            if closest_date is None:
+                return None
             print(f"Using closest available date: {closest_date}")
-            day_data = meter_data[meter_data['Date'] == closest_date].copy()
+            day_data = day_index.load_day(meter_id, closest_date)
             target_date = str(closest_date)
         else:
-            return None
+            # Let's check what dates are available around the target date
+            window_start = pd.Timestamp(target_date_pd) - pd.Timedelta(days=7)
+            meter_data = load_meter_data([meter_id], window_start, window_start + pd.Timedelta(days=15))
+            meter_data['day'] = day_numbers(meter_data['Meter Datetime'])
+            available_dates = [day.date() for day in day_dates(np.unique(meter_data['day']))]
+            
+            # Show some dates around the target date
+            nearby_dates = [d for d in available_dates if abs((d - target_date_pd).days) <= 7]
+            if nearby_dates:
+                print(f"Dates within 7 days of {target_date}: {nearby_dates}")
+                # Use the closest available date
+                closest_date = min(nearby_dates, key=lambda x: abs((x - target_date_pd).days))
+                print(f"Using closest available date: {closest_date}")
+                day_data = meter_data[meter_data['day'] == day_numbers([closest_date])[0]].copy()
+                target_date = str(closest_date)
+            else:
+                return None
     
     if len(day_data) == 0:
         print("Still no data found")
         return None
     
+    day_data['Hour'] = day_data['Meter Datetime'].dt.hour
+    
     # Sort by time
     day_data = day_data.sort_values('Meter Datetime')
     
@@ -125,7 +131,7 @@ def plot_meter_specific_day(meter_id='AES2020896472402', target_date='2023-05-10
     ax4.axis('off')
     
     # Calculate detailed statistics
-    total_consumption = consumption_values.sum()
+    total_consumption = interval_energy(day_data)['energy_wh'].sum()
     avg_consumption = consumption_values.mean()
     max_consumption = consumption_values.max()
     min_consumption = consumption_values.min()
@@ -207,17 +213,16 @@ def check_available_dates(meter_id='AES2020896472402'):
     
     print(f"Checking available dates for meter {meter_id}...")
     
-    df = pd.read_csv('combined_load_profile_electrical.csv')
-    df['Meter Datetime'] = pd.to_datetime(df['Meter Datetime'])
-    df['Date'] = df['Meter Datetime'].dt.date
-    
-    meter_data = df[df['HES Meter Id'] == meter_id]
+    if store_exists():
+        available_dates = [d.item() for d in load_day_index().dates(meter_id)]
+    else:
+        meter_data = load_meter_data([meter_id], columns=['Meter Datetime'])
+        available_dates = [day.date() for day in day_dates(np.unique(day_numbers(meter_data['Meter Datetime'])))]
     
-    if len(meter_data) == 0:
+    if len(available_dates) == 0:
         print(f"No data found for meter {meter_id}")
         return
     
-    available_dates = sorted(meter_data['Date'].unique())
     print(f"Available date range: {available_dates[0]} to {available_dates[-1]}")
     print(f"Total available dates: {len(available_dates)}")
     
@@ -0,0 +1,166 @@
+import os
+import argparse
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from scene_data import POWER_COL, scene_source, consumption_days, highest_night, night_day_profile, night_energy
+
+# Quick matplotlib stand-in for the manim renders: the same scene data drawn
+# as low-resolution frames or one storyboard image, without manim
+PREVIEW_DIR = 'preview'
+
+# Manim's default 16:9 frame
+FRAME_SIZE = (8, 4.5)
+
+
+def _style_axes(ax, max_power):
+    ax.set_facecolor('black')
+    ax.set_xlim(0, 23)
+    ax.set_ylim(0, max_power * 1.1)
+    ax.set_xticks([0, 6, 12, 18, 23])
+    ax.set_xlabel('Hour of Day')
+    ax.set_ylabel('Power (W)')
+
+
+def _partial_day(values, fraction):
+    """The first fraction of a day's polyline, ending between two hours like pointwise_become_partial"""
+
+    end = fraction * (len(values) - 1)
+    hours = np.arange(int(end) + 1, dtype=float)
+    points = values[:int(end) + 1]
+    if end > int(end):
+        hours = np.append(hours, end)
+        points = np.append(points, np.interp(end, np.arange(len(values)), values))
+    return hours, points
+
+
+class ConsumptionPreview:
+    """MeterConsumptionAnimation: days revealed one after another, finished days dimmed"""
+
+    name = 'main'
+
+    def __init__(self, csv_filename=None, meter_id=None, steps_per_day=4):
+        self.labels, self.day_values = consumption_days(csv_filename, meter_id)
+        self.max_power = np.nanmax(self.day_values)
+        self.states = [(day, step / steps_per_day) for day in range(len(self.day_values))
+                       for step in range(1, steps_per_day + 1)]
+
+    def draw(self, ax, state):
+        day, fraction = state
+        _style_axes(ax, self.max_power)
+
+        hours = np.arange(24)
+        past = [np.column_stack([hours, values]) for values in self.day_values[:day]]
+        ax.add_collection(LineCollection(past, colors='tab:blue', alpha=0.2, linewidths=1.5))
+        ax.plot(*_partial_day(self.day_values[day], fraction), color='tab:blue', linewidth=1.5)
+
+        week = day // 7
+        ax.set_title(f'{self.labels[week]} - day {day + 1} of {len(self.day_values)}', fontsize=10)
+
+
+class HighestNightPreview:
+    """HighestNightConsumptionAnimation: the day drawn hour by hour, night hours in red"""
+
+    name = 'highest-night'
+
+    def __init__(self, csv_filename=None, meter_id=None, target_date=None):
+        if target_date is None:
+            target_date, self.night_total = highest_night(csv_filename, meter_id)
+        else:
+            self.night_total = night_energy(csv_filename, meter_id, target_date)
+        self.hourly_data = night_day_profile(csv_filename, meter_id, target_date)
+        self.target_date = target_date
+        self.max_power = self.hourly_data[POWER_COL].max()
+        # One state per revealed hour, then the closing statistics
+        self.states = list(range(1, len(self.hourly_data) + 1)) + ['stats']
+
+    def draw(self, ax, state):
+        _style_axes(ax, self.max_power)
+
+        shown = self.hourly_data if state == 'stats' else self.hourly_data.iloc[:state]
+        hours = shown['hour'].to_numpy()
+        power = shown[POWER_COL].to_numpy()
+        colors = np.where(shown['night'], 'red', 'tab:blue')
+
+        # Each segment takes the color of the hour it starts from
+        segments = [[(hours[i], power[i]), (hours[i + 1], power[i + 1])] for i in range(len(shown) - 1)]
+        ax.add_collection(LineCollection(segments, colors=colors[:-1], linewidths=2))
+        ax.scatter(hours, power, c=colors, s=12, zorder=3)
+
+        if state == 'stats':
+            night = self.hourly_data.loc[self.hourly_data['night'], POWER_COL]
+            ax.scatter(hours[shown['night']], power[shown['night']], s=120, facecolors='none',
+                       edgecolors='red', zorder=4)
+            ax.text(0.02, 0.05, f'Night Hours Total: {self.night_total:.2f} kWh\nNight Hours Avg: {night.mean():.0f}W\n'
+                                f'Peak Night: {night.max():.0f}W', transform=ax.transAxes, color='red', fontsize=8)
+            ax.set_title(f'Highest Night Consumption Day - {self.target_date}', fontsize=10)
+        else:
+            ax.set_title(f'Hour: {hours[-1]}  Power: {power[-1]:.0f}W'
+                         + ('  NIGHT HOUR' if shown['night'].iloc[-1] else ''), fontsize=10)
+
+
+SCENES = {preview.name: preview for preview in [ConsumptionPreview, HighestNightPreview]}
+
+
+def render_frames(preview, output_dir, dpi=60):
+    """Save every state as a low-resolution frame, reusing one figure"""
+
+    os.makedirs(output_dir, exist_ok=True)
+    fig, ax = plt.subplots(figsize=FRAME_SIZE)
+
+    filenames = []
+    for i, state in enumerate(preview.states):
+        ax.clear()
+        preview.draw(ax, state)
+        filename = os.path.join(output_dir, f'frame_{i:04d}.png')
+        fig.savefig(filename, dpi=dpi)
+        filenames.append(filename)
+
+    plt.close(fig)
+    return filenames
+
+
+def render_storyboard(preview, filename, panels=8, dpi=80):
+    """Save evenly spaced states, always including the last, as one grid image"""
+
+    picks = np.unique(np.linspace(0, len(preview.states) - 1, panels).round().astype(int))
+    cols = min(4, len(picks))
+    rows = -(-len(picks) // cols)
+
+    fig, axes = plt.subplots(rows, cols, figsize=(FRAME_SIZE[0] / 2 * cols, FRAME_SIZE[1] / 2 * rows),
+                             squeeze=False)
+    for ax, pick in zip(axes.flat, picks):
+        preview.draw(ax, preview.states[pick])
+    for ax in axes.flat[len(picks):]:
+        ax.axis('off')
+
+    fig.tight_layout()
+    fig.savefig(filename, dpi=dpi)
+    plt.close(fig)
+    return filename
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Preview a manim scene with matplotlib in seconds')
+    parser.add_argument('scene', choices=list(SCENES))
+    parser.add_argument('--storyboard', action='store_true', help='Write one storyboard image instead of frames')
+    parser.add_argument('--csv', help='Readings CSV (default: the scene default, or METER_CSV)')
+    parser.add_argument('--meter', help='Meter id (default: the scene default, or METER_ID)')
+    parser.add_argument('--output-dir', default=PREVIEW_DIR)
+    parser.add_argument('--dpi', type=int, default=60, help='Resolution of the frames')
+    args = parser.parse_args()
+
+    # Flags given on the command line win over the environment
+    csv_filename, meter_id = scene_source(args.csv, args.meter)
+
+    with plt.style.context('dark_background'):
+        preview = SCENES[args.scene](csv_filename, meter_id)
+        if args.storyboard:
+            os.makedirs(args.output_dir, exist_ok=True)
+            filename = render_storyboard(preview, os.path.join(args.output_dir, f'{args.scene}_storyboard.png'))
+            print(f'Storyboard saved as: {filename}')
+        else:
+            filenames = render_frames(preview, os.path.join(args.output_dir, args.scene), args.dpi)
+            print(f'Saved {len(filenames)} frames to {os.path.join(args.output_dir, args.scene)}')
@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+import pandas as pd
+from meter_store import (STORE_DIR, METER_COL, TIME_COL, MANIFEST_FILENAME, store_exists,
+                         iter_meter_frames)
+
+# Per-meter hourly and per-day profiles, built once per version of the source data:
+# profile_cache/<fingerprint>/{hourly,daily}.parquet
+PROFILE_CACHE_DIR = 'profile_cache'
+
+# Bump whenever the way profiles are computed changes, so old caches are not reused
+PROFILE_CACHE_VERSION = 1
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+SLOTS_PER_DAY = 48
+
+
+def source_fingerprint(source=None):
+    """Fingerprint of the readings the profiles are built from.
+
+    The store is identified by its ingest manifest (file hashes and
+    high-water marks), a CSV by its path, size and modification time.
+    """
+
+    digest = hashlib.sha256(f'profiles-v{PROFILE_CACHE_VERSION}'.encode())
+
+    if source is None:
+        manifest_path = os.path.join(STORE_DIR, MANIFEST_FILENAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'rb') as f:
+                digest.update(f.read())
+            return digest.hexdigest()[:16]
+        # A store without a manifest (or no store at all) is identified by the CSV it mirrors
+        source = 'combined_load_profile_electrical.csv'
+
+    stat = os.stat(source)
+    digest.update(f'{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def _profiles_for(readings):
+    """Hourly statistics and half-hourly day profiles for a frame of readings"""
+
+    meter_datetime = readings[TIME_COL]
+    power = readings[POWER_COL]
+    meters = readings[METER_COL]
+
+    hourly = power.groupby([meters, meter_datetime.dt.hour.rename('Hour')]).agg(
+        ['mean', 'median', 'max', 'min', 'count'])
+
+    slot = (meter_datetime.dt.hour * 2 + meter_datetime.dt.minute // 30).rename('slot')
+    daily = power.groupby([meters, meter_datetime.dt.normalize().rename('Date'), slot]).mean()
+    daily = daily.unstack('slot').reindex(columns=range(SLOTS_PER_DAY))
+
+    return hourly, daily
+
+
+def build_profiles(source=None, cache_dir=PROFILE_CACHE_DIR):
+    """Compute and persist the profiles of every meter in the source"""
+
+    fingerprint = source_fingerprint(source)
+    target = os.path.join(cache_dir, fingerprint)
+
+    print(f'Building hourly/daily profile cache in {target}...')
+
+    if source is None and store_exists():
+        # One meter in memory at a time
+        parts = [_profiles_for(readings) for _, readings in
+                 iter_meter_frames(columns=[METER_COL, TIME_COL, POWER_COL])]
+    else:
+        csv_filename = source or 'combined_load_profile_electrical.csv'
+        readings = pd.read_csv(csv_filename, usecols=[METER_COL, TIME_COL, POWER_COL])
+        readings[TIME_COL] = pd.to_datetime(readings[TIME_COL])
+        parts = [_profiles_for(readings)]
+
+    hourly = pd.concat([p[0] for p in parts])
+    daily = pd.concat([p[1] for p in parts])
+    daily.columns = [f'slot_{slot:02d}' for slot in daily.columns]
+
+    os.makedirs(target + '.tmp', exist_ok=True)
+    hourly.reset_index().to_parquet(os.path.join(target + '.tmp', 'hourly.parquet'), index=False)
+    daily.reset_index().to_parquet(os.path.join(target + '.tmp', 'daily.parquet'), index=False)
+    with open(os.path.join(target + '.tmp', 'meta.json'), 'w') as f:
+        json.dump({'version': PROFILE_CACHE_VERSION, 'source': source or STORE_DIR,
+                   'meters': int(hourly.index.get_level_values(0).nunique())}, f, indent=2)
+    os.replace(target + '.tmp', target)
+
+    print(f'  Profiled {hourly.index.get_level_values(0).nunique()} meters, {len(daily):,} meter-days')
+
+    return target
+
+
+def ensure_profiles(source=None, cache_dir=PROFILE_CACHE_DIR):
+    """Path of the profile cache for the current source data, building it if needed"""
+
+    target = os.path.join(cache_dir, source_fingerprint(source))
+    if not os.path.isdir(target):
+        build_profiles(source, cache_dir)
+    return target
+
+
+def profiles_cached(source=None, cache_dir=PROFILE_CACHE_DIR):
+    """Whether the profile cache for the current source data is already built"""
+
+    return os.path.isdir(os.path.join(cache_dir, source_fingerprint(source)))
+
+
+def _read_profiles(name, meter_ids, source, cache_dir):
+    path = os.path.join(ensure_profiles(source, cache_dir), f'{name}.parquet')
+    if isinstance(meter_ids, str):
+        meter_ids = [meter_ids]
+    filters = [(METER_COL, 'in', list(meter_ids))] if meter_ids is not None else None
+    return pd.read_parquet(path, filters=filters)
+
+
+def load_hourly_profiles(meter_ids=None, source=None, cache_dir=PROFILE_CACHE_DIR):
+    """Per-(meter, hour) mean/median/max/min/count of the import power"""
+
+    hourly = _read_profiles('hourly', meter_ids, source, cache_dir)
+    return hourly.set_index([METER_COL, 'Hour']).sort_index()
+
+
+def load_hourly_matrix(meter_ids=None, source=None, cache_dir=PROFILE_CACHE_DIR):
+    """Meters x 24 matrix of hourly mean power, NaN where an hour has no readings"""
+
+    hourly = load_hourly_profiles(meter_ids, source, cache_dir)
+    matrix = hourly['mean'].unstack('Hour').reindex(columns=range(24))
+    if meter_ids is not None:
+        matrix = matrix.reindex([meter_ids] if isinstance(meter_ids, str) else list(meter_ids))
+    return matrix
+
+
+def load_daily_profiles(meter_ids=None, source=None, cache_dir=PROFILE_CACHE_DIR):
+    """(meter, date) x 48 half-hour slots of mean power, NaN where a slot has no readings"""
+
+    daily = _read_profiles('daily', meter_ids, source, cache_dir)
+    daily = daily.set_index([METER_COL, 'Date']).sort_index()
+    daily.columns = pd.RangeIndex(SLOTS_PER_DAY, name='slot')
+    return daily
+
+
+def profile_time_series(daily_profiles):
+    """Flatten (date x half-hour slot) profiles into a Meter Datetime/power series"""
+
+    series = daily_profiles.stack().rename(POWER_COL).reset_index()
+    series[TIME_COL] = series['Date'] + pd.to_timedelta(series['slot'] * 30, unit='min')
+    series['Hour'] = series['slot'] // 2
+
+    return series[[TIME_COL, 'Hour', POWER_COL]]
@@ -0,0 +1,136 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import numpy as np
+from datetime import datetime
+from scene_data import POWER_COL, scene_source, consumption_days, highest_night, night_day_profile
+
+# Finished videos keyed by a hash of everything that decides what the scene
+# draws: render_cache/<digest>.mp4, described in render_cache/index.json
+RENDER_CACHE_DIR = 'render_cache'
+INDEX_FILENAME = 'index.json'
+
+
+def _consumption_inputs(csv_filename, meter_id):
+    labels, day_values = consumption_days(csv_filename, meter_id)
+    return {'labels': labels, 'day_values': day_values}
+
+
+def _highest_night_inputs(csv_filename, meter_id):
+    target_date, night_total = highest_night(csv_filename, meter_id)
+    hourly_data = night_day_profile(csv_filename, meter_id, target_date)
+    return {'target_date': str(target_date), 'night_total': float(night_total),
+            'hours': hourly_data['hour'].to_numpy(), 'power': hourly_data[POWER_COL].to_numpy()}
+
+
+# Scene name -> (module, class, prepared inputs of the scene)
+SCENES = {
+    'main': ('main', 'MeterConsumptionAnimation', _consumption_inputs),
+    'highest-night': ('highest_night_consumption_animation', 'HighestNightConsumptionAnimation',
+                      _highest_night_inputs),
+}
+
+
+def _update_digest(digest, value):
+    if isinstance(value, np.ndarray):
+        digest.update(f'{value.dtype}{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(key.encode())
+            _update_digest(digest, value[key])
+    else:
+        digest.update(repr(value).encode())
+
+
+def scene_digest(scene, csv_filename=None, meter_id=None, quality='low_quality'):
+    """Hash of a scene's prepared inputs, its source code and the render quality"""
+
+    module_name, _, prepare = SCENES[scene]
+    inputs = prepare(csv_filename, meter_id)
+
+    digest = hashlib.sha256()
+    _update_digest(digest, {'scene': scene, 'quality': quality, 'inputs': inputs})
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), f'{module_name}.py'), 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def load_index(cache_dir=RENDER_CACHE_DIR):
+    index_path = os.path.join(cache_dir, INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def save_index(index, cache_dir=RENDER_CACHE_DIR):
+    """Write the index atomically so an interrupted run never leaves it half written"""
+
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, INDEX_FILENAME)
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(index_path + '.tmp', index_path)
+
+
+def _render(scene, csv_filename, meter_id, quality, media_dir):
+    # manim's config is process-global, so it is only imported and set here.
+    # Its own partial-movie cache keys on mobject state and never hits across
+    # runs, so it is switched off in favour of the digest above
+    from importlib import import_module
+    from manim import tempconfig
+
+    module_name, class_name, _ = SCENES[scene]
+    scene_class = getattr(import_module(module_name), class_name)
+
+    with tempconfig({'media_dir': media_dir, 'quality': quality, 'disable_caching': True}):
+        instance = scene_class()
+        instance.csv_filename = csv_filename
+        instance.meter_id = meter_id
+        instance.render()
+        return str(instance.renderer.file_writer.movie_file_path)
+
+
+def render_scene(scene, csv_filename=None, meter_id=None, quality='low_quality', media_dir='media',
+                 cache_dir=RENDER_CACHE_DIR, force=False):
+    """Path of the scene's video, rendering it only when its inputs have changed"""
+
+    csv_filename, meter_id = scene_source(csv_filename, meter_id)
+    digest = scene_digest(scene, csv_filename, meter_id, quality)
+    cached_video = os.path.join(cache_dir, f'{digest}.mp4')
+
+    if not force and os.path.exists(cached_video):
+        print(f'{scene} ({meter_id or csv_filename}): unchanged, reusing {cached_video}')
+        return cached_video
+
+    video = _render(scene, csv_filename, meter_id, quality, media_dir)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    shutil.copyfile(video, cached_video + '.tmp')
+    os.replace(cached_video + '.tmp', cached_video)
+
+    # Concurrent renders each rewrite the index; a lost entry only costs its description
+    index = load_index(cache_dir)
+    index[digest] = {'scene': scene, 'csv': csv_filename, 'meter_id': meter_id, 'quality': quality,
+                     'rendered_at': datetime.now().isoformat(timespec='seconds')}
+    save_index(index, cache_dir)
+
+    print(f'{scene} ({meter_id or csv_filename}): rendered {cached_video}')
+    return cached_video
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render a manim scene unless its inputs are unchanged')
+    parser.add_argument('scene', choices=list(SCENES))
+    parser.add_argument('--csv', help='Readings CSV (default: the scene default, or METER_CSV)')
+    parser.add_argument('--meter', help='Meter id (default: the scene default, or METER_ID)')
+    parser.add_argument('--quality', default='low_quality',
+                        choices=['low_quality', 'medium_quality', 'high_quality', 'production_quality'])
+    parser.add_argument('--media-dir', default='media')
+    parser.add_argument('--force', action='store_true', help='Render even when a cached video exists')
+    args = parser.parse_args()
+
+    video = render_scene(args.scene, args.csv, args.meter, args.quality, args.media_dir, force=args.force)
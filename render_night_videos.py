@@ -0,0 +1,58 @@
+import os
+import argparse
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from render_cache import render_scene
+
+# Per-meter renders of HighestNightConsumptionAnimation go to
+# night_videos/<meter_id>/, each a complete manim media directory so parallel
+# renders never share partial movie files
+VIDEO_DIR = 'night_videos'
+
+
+def top_anomalous_meters(analysis_csv='anomalous_meters_analysis.csv', top_n=5):
+    """Meter ids of the top_n rows of the anomaly ranking (highest score first)"""
+
+    ranking = pd.read_csv(analysis_csv)
+    ranking = ranking.sort_values('anomaly_score', ascending=False, kind='stable')
+    return ranking['meter_id'].astype(str).head(top_n).tolist()
+
+
+def render_meter_video(meter_id, output_dir=VIDEO_DIR, quality='low_quality', force=False):
+    """Render the highest-night animation of one meter unless its inputs are
+    unchanged since the last render; runs inside a worker process"""
+
+    media_dir = os.path.join(output_dir, meter_id)
+    return render_scene('highest-night', meter_id=meter_id, quality=quality, media_dir=media_dir, force=force)
+
+
+def render_night_videos(meter_ids, workers=None, output_dir=VIDEO_DIR, quality='low_quality', force=False):
+    """Render the meters' videos in parallel processes, returning {meter_id: video path}"""
+
+    print(f'Rendering highest-night animations for {len(meter_ids)} meters...')
+
+    videos = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {meter_id: executor.submit(render_meter_video, meter_id, output_dir, quality, force)
+                   for meter_id in meter_ids}
+        for meter_id, future in futures.items():
+            videos[meter_id] = future.result()
+            print(f'  {meter_id}: {videos[meter_id]}')
+
+    return videos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render HighestNightConsumptionAnimation for the top anomalous meters')
+    parser.add_argument('--top', type=int, default=5, help='Number of meters from the anomaly ranking')
+    parser.add_argument('--analysis-csv', default='anomalous_meters_analysis.csv')
+    parser.add_argument('--meters', nargs='*', help='Render these meters instead of the ranking')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--quality', default='low_quality',
+                        choices=['low_quality', 'medium_quality', 'high_quality', 'production_quality'])
+    parser.add_argument('--output-dir', default=VIDEO_DIR)
+    parser.add_argument('--force', action='store_true', help='Re-render meters whose inputs are unchanged')
+    args = parser.parse_args()
+
+    meter_ids = args.meters or top_anomalous_meters(args.analysis_csv, args.top)
+    videos = render_night_videos(meter_ids, args.workers, args.output_dir, args.quality, args.force)
@@ -0,0 +1,200 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from meter_store import METER_COL, TIME_COL, load_meter_data
+from profile_cache import source_fingerprint
+from meter_grid import load_meter_grid
+from meter_matrix import load_meter_matrix
+from compact_readings import read_readings_csv
+from analyze_night_consumption import NIGHT_HOURS, daily_night_consumption, highest_night_day
+
+# Data preparation shared by the manim scenes. The readings of a meter are
+# parsed once per version of their source and kept in
+# scene_cache/readings-<key>.parquet
+SCENE_CACHE_DIR = 'scene_cache'
+
+# Bump whenever the way the cached readings are prepared changes
+SCENE_CACHE_VERSION = 2
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+DEFAULT_CSV = 'cleaned_meter_KFM2020660190982.csv'
+
+# Meteorological seasons by month; December counts towards the next year's winter
+SEASON_BY_MONTH = {12: 'Winter', 1: 'Winter', 2: 'Winter', 3: 'Spring', 4: 'Spring', 5: 'Spring',
+                   6: 'Summer', 7: 'Summer', 8: 'Summer', 9: 'Fall', 10: 'Fall', 11: 'Fall'}
+
+
+def scene_source(csv_filename=None, meter_id=None):
+    """Resolve a scene's data source.
+
+    manim cannot pass arguments to a scene, so METER_CSV and METER_ID in the
+    environment stand in for whichever of the scene's defaults is left None;
+    explicit arguments always win. A meter without a CSV is read from the
+    partitioned store; with neither, the single-meter CSV is used.
+    """
+
+    if csv_filename is None:
+        csv_filename = os.environ.get('METER_CSV')
+    if meter_id is None:
+        meter_id = os.environ.get('METER_ID')
+    if csv_filename is None and meter_id is None:
+        csv_filename = DEFAULT_CSV
+    return csv_filename, meter_id
+
+
+def _cache_path(csv_filename, meter_id, cache_dir):
+    key = hashlib.sha256(f'scene-v{SCENE_CACHE_VERSION}:{source_fingerprint(csv_filename)}:{meter_id}'.encode())
+    return os.path.join(cache_dir, f'readings-{key.hexdigest()[:16]}.parquet')
+
+
+def _read_readings(csv_filename, meter_id):
+    if csv_filename is None:
+        return load_meter_data([meter_id], columns=[POWER_COL])
+
+    readings = read_readings_csv(csv_filename, [METER_COL, TIME_COL, POWER_COL], add_day_hour=False)
+    if meter_id is not None:
+        readings = readings[readings[METER_COL] == meter_id]
+    elif readings[METER_COL].nunique() > 1:
+        raise ValueError(f'{csv_filename} holds {readings[METER_COL].nunique()} meters, set METER_ID to pick one')
+    return readings
+
+
+def load_meter_readings(csv_filename=None, meter_id=None, cache_dir=SCENE_CACHE_DIR):
+    """Parsed, time-sorted readings of one meter, read from the source only when it has changed"""
+
+    if csv_filename is None and meter_id is None:
+        csv_filename = DEFAULT_CSV
+
+    path = _cache_path(csv_filename, meter_id, cache_dir)
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+
+    readings = _read_readings(csv_filename, meter_id)
+    if len(readings) == 0:
+        raise ValueError(f'No readings for meter {meter_id} in {csv_filename or "the store"}')
+    readings = readings.sort_values(TIME_COL).reset_index(drop=True)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    readings.to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+
+    return readings
+
+
+def load_hourly_series(csv_filename=None, meter_id=None):
+    """Hourly series of one meter over the days it has readings, from the source's 30-minute grid.
+    A meter in the store is read from its row of the store's memory-mapped matrix."""
+
+    if csv_filename is None and meter_id is None:
+        csv_filename = DEFAULT_CSV
+
+    if csv_filename is None:
+        grid = load_meter_matrix()
+        if meter_id not in grid:
+            raise ValueError(f'No readings for meter {meter_id} in the store')
+    else:
+        grid = load_meter_grid(csv_filename)
+    if meter_id is None:
+        if len(grid.meter_ids) > 1:
+            raise ValueError(f'{csv_filename} holds {len(grid.meter_ids)} meters, set METER_ID to pick one')
+        meter_id = grid.meter_ids[0]
+
+    first, last = grid.span(meter_id)
+    days = slice(grid.day_number(first), grid.day_number(last) + 1)
+    hourly = grid.hourly(meter_id)[days].ravel()
+    return pd.Series(hourly, index=pd.date_range(first, periods=len(hourly), freq='h'), name=POWER_COL)
+
+
+def daily_matrix(hourly):
+    """Days x 24 array of hourly values over whole calendar days, and the dates of its rows"""
+
+    start = hourly.index.min().normalize()
+    end = hourly.index.max().normalize() + pd.Timedelta(days=1)
+    hours = pd.date_range(start, end, freq='h', inclusive='left')
+    values = hourly.reindex(hours).to_numpy(dtype=float).reshape(-1, 24)
+    return values, pd.date_range(start, end, freq='D', inclusive='left')
+
+
+def season_weeks(hourly):
+    """One complete week (7 whole days, no missing hour) per season in the data.
+
+    Each calendar season occurrence (e.g. Winter 2023 = Dec 2022-Feb 2023)
+    contributes the complete week lying wholly inside it whose start is closest
+    to the middle of the days the season covers. Returns (label, week) pairs
+    in date order, each week a 168-value hourly Series.
+    """
+
+    values, dates = daily_matrix(hourly)
+    complete_days = ~np.isnan(values).any(axis=1)
+
+    # A week starting on day d is complete when all of days d..d+6 are
+    complete_count = np.concatenate([[0], np.cumsum(complete_days)])
+    n_starts = max(len(dates) - 6, 0)
+    week_complete = (complete_count[7:7 + n_starts] - complete_count[:n_starts]) == 7
+
+    seasons = dates.month.map(SEASON_BY_MONTH).to_numpy()
+    season_years = (dates.year + (dates.month == 12)).to_numpy()
+    same_season = ((seasons[:n_starts] == seasons[6:6 + n_starts])
+                   & (season_years[:n_starts] == season_years[6:6 + n_starts]))
+
+    days = pd.DataFrame({'season': seasons, 'season_year': season_years, 'day': np.arange(len(dates))})
+    middle = days.groupby(['season_year', 'season'])['day'].transform('mean').to_numpy()
+
+    starts = days.iloc[:n_starts][week_complete & same_season].copy()
+    if len(starts) == 0:
+        return []
+    starts['distance'] = np.abs(starts['day'] + 3 - middle[:n_starts][week_complete & same_season])
+    chosen = starts.sort_values(['distance', 'day']).groupby(['season_year', 'season']).head(1).sort_values('day')
+
+    weeks = []
+    for row in chosen.itertuples():
+        week = pd.Series(values[row.day:row.day + 7].ravel(),
+                         index=pd.date_range(dates[row.day], periods=168, freq='h'), name=POWER_COL)
+        weeks.append((f'{row.season} {row.season_year}', week))
+    return weeks
+
+
+def consumption_days(csv_filename=None, meter_id=None):
+    """Inputs of MeterConsumptionAnimation: the season labels of the chosen
+    weeks and a days x 24 array of their hourly readings, in date order"""
+
+    weeks = season_weeks(load_hourly_series(csv_filename, meter_id))
+    if not weeks:
+        raise ValueError('No complete week of hourly readings to animate')
+    labels = [label for label, _ in weeks]
+    day_values = np.concatenate([week.to_numpy().reshape(7, 24) for _, week in weeks])
+    return labels, day_values
+
+
+def highest_night(csv_filename=None, meter_id=None):
+    """Date with the highest night energy of a meter and that energy in kWh,
+    by the same night window as analyze_night_consumption"""
+
+    return highest_night_day(load_meter_readings(csv_filename, meter_id))
+
+
+def night_energy(csv_filename=None, meter_id=None, target_date=None):
+    """Night energy (kWh) of one calendar date, the highest night's by default"""
+
+    if target_date is None:
+        return highest_night(csv_filename, meter_id)[1]
+    totals = daily_night_consumption(load_meter_readings(csv_filename, meter_id))
+    return totals['energy_kwh'].get(pd.Timestamp(target_date).normalize(), 0.0)
+
+
+def night_day_profile(csv_filename=None, meter_id=None, target_date=None, night_hours=NIGHT_HOURS):
+    """Inputs of HighestNightConsumptionAnimation: one day's hourly readings
+    with hour and night-flag columns, hours without readings left out.
+    The day defaults to the meter's highest night consumption day."""
+
+    if target_date is None:
+        target_date, _ = highest_night(csv_filename, meter_id)
+
+    hourly = load_hourly_series(csv_filename, meter_id)
+    start = pd.Timestamp(target_date).normalize()
+    day = hourly[start:start + pd.Timedelta(hours=23)].dropna()
+
+    hourly_data = pd.DataFrame({'hour': day.index.hour, POWER_COL: day.to_numpy()})
+    hourly_data['night'] = hourly_data['hour'].isin(night_hours)
+    return hourly_data
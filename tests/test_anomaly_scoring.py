@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pytest
+from analyze_anomalous_consumption import (POWER_COL, analyze_hourly_patterns, analyze_matrix, analyze_sharded,
+                                           rank_anomalous_meters)
+from meter_store import METER_COL, TIME_COL, write_meter_store
+
+# Meters without night or day hours take nanmax/nanmin of empty rows before they are dropped
+pytestmark = pytest.mark.filterwarnings('ignore:All-NaN slice')
+
+
+def reference_anomalous_meters(hourly_stats, meter_stats):
+    """The per-meter loop identify_anomalous_meters used before scoring was vectorized"""
+
+    night_hours = list(range(21, 24)) + list(range(0, 5))
+    anomalous_meters = []
+
+    for meter_id in hourly_stats['HES Meter Id'].unique():
+        meter_hourly = hourly_stats[hourly_stats['HES Meter Id'] == meter_id]
+        meter_overall = meter_stats[meter_stats['HES Meter Id'] == meter_id].iloc[0]
+
+        night_data = meter_hourly[meter_hourly['Hour'].isin(night_hours)]
+        day_data = meter_hourly[~meter_hourly['Hour'].isin(night_hours)]
+
+        if len(night_data) == 0 or len(day_data) == 0:
+            continue
+
+        night_avg = night_data['mean'].mean()
+        day_avg = day_data['mean'].mean()
+        night_max = night_data['mean'].max()
+        night_min = night_data['mean'].min()
+        overall_max = meter_overall['max']
+        overall_min = meter_overall['min']
+        overall_mean = meter_overall['mean']
+
+        anomaly_score = 0
+        anomaly_reasons = []
+
+        if night_max > 0.7 * overall_max:
+            anomaly_score += 3
+            anomaly_reasons.append(f"High night peak: {night_max:.0f}W vs overall max {overall_max:.0f}W")
+
+        if night_avg > day_avg:
+            anomaly_score += 2
+            anomaly_reasons.append(f"Night avg ({night_avg:.0f}W) > Day avg ({day_avg:.0f}W)")
+
+        if night_min > 0.5 * overall_mean:
+            anomaly_score += 2
+            anomaly_reasons.append(f"High night minimum: {night_min:.0f}W vs overall mean {overall_mean:.0f}W")
+
+        night_consumption_trend = night_data.sort_values('Hour')['mean'].values
+        if len(night_consumption_trend) > 2:
+            increasing_trend = np.polyfit(range(len(night_consumption_trend)), night_consumption_trend, 1)[0]
+            if increasing_trend > 10:
+                anomaly_score += 1
+                anomaly_reasons.append(f"Increasing night trend: +{increasing_trend:.1f}W/hour")
+
+        if anomaly_score >= 2:
+            anomalous_meters.append({
+                'meter_id': meter_id,
+                'anomaly_score': anomaly_score,
+                'night_avg': night_avg,
+                'day_avg': day_avg,
+                'night_max': night_max,
+                'night_min': night_min,
+                'overall_max': overall_max,
+                'overall_min': overall_min,
+                'overall_mean': overall_mean,
+                'reasons': anomaly_reasons
+            })
+
+    return sorted(anomalous_meters, key=lambda x: x['anomaly_score'], reverse=True)
+
+
+def synthetic_fleet(n_meters=300, n_days=6, seed=0):
+    """Readings of meters with day, night and rising-night profiles, random missing hours,
+    plus meters with no night hours, no day hours and a flat series"""
+
+    rng = np.random.default_rng(seed)
+    hours = np.tile(np.arange(24), n_days)
+    night = np.isin(hours, [21, 22, 23, 0, 1, 2, 3, 4])
+
+    frames = []
+    for m in range(n_meters):
+        base = rng.uniform(50, 500)
+        kind = m % 4
+        if kind == 0:
+            # Daytime load that drops towards zero at night
+            power = base * (0.1 + np.clip(np.sin((hours - 5) / 16 * np.pi), 0, None))
+        elif kind == 1:
+            # Night load a bit below or above the day load
+            power = np.where(night, base * rng.uniform(0.4, 1.6), base)
+        elif kind == 2:
+            # Night load rising with the clock hour, the order the trend is fitted in
+            power = np.where(night, base + rng.uniform(0, 30) * hours, base * rng.uniform(0.5, 3))
+        else:
+            power = rng.uniform(0, 2 * base, len(hours))
+        power = power + rng.normal(0, base * 0.1, len(hours))
+
+        keep = rng.random(len(hours)) > rng.uniform(0, 0.4)
+        if m % 17 == 0:
+            keep &= ~np.isin(hours, [22, 2])
+        frames.append(pd.DataFrame({'HES Meter Id': f'M{m:04d}', 'Hour': hours[keep], POWER_COL: power[keep]}))
+
+    day_hours = np.arange(5, 21)
+    frames.append(pd.DataFrame({'HES Meter Id': 'NO_NIGHT', 'Hour': day_hours, POWER_COL: rng.uniform(0, 900, 16)}))
+    night_hours = np.array([21, 22, 23, 0, 1, 2, 3, 4])
+    frames.append(pd.DataFrame({'HES Meter Id': 'NO_DAY', 'Hour': night_hours, POWER_COL: rng.uniform(0, 900, 8)}))
+    frames.append(pd.DataFrame({'HES Meter Id': 'FLAT', 'Hour': np.arange(24), POWER_COL: 250.0}))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_vectorized_scoring_matches_reference_loop(seed):
+    hourly_stats, meter_stats = analyze_hourly_patterns(synthetic_fleet(seed=seed))
+
+    expected = reference_anomalous_meters(hourly_stats, meter_stats)
+    actual = rank_anomalous_meters(hourly_stats, meter_stats)
+
+    assert [m['meter_id'] for m in actual] == [m['meter_id'] for m in expected]
+    assert [m['anomaly_score'] for m in actual] == [m['anomaly_score'] for m in expected]
+    assert [m['reasons'] for m in actual] == [m['reasons'] for m in expected]
+    for key in ['night_avg', 'day_avg', 'night_max', 'night_min', 'overall_max', 'overall_min', 'overall_mean']:
+        assert [m[key] for m in actual] == pytest.approx([m[key] for m in expected], rel=1e-12)
+
+
+def test_meters_without_night_or_day_hours_are_skipped():
+    hourly_stats, meter_stats = analyze_hourly_patterns(synthetic_fleet(n_meters=30))
+
+    flagged = {m['meter_id'] for m in rank_anomalous_meters(hourly_stats, meter_stats)}
+
+    assert 'NO_NIGHT' not in flagged
+    assert 'NO_DAY' not in flagged
+
+
+def test_flat_series_scores_like_reference():
+    # Night peak 250 > 0.7 x 250 and night minimum 250 > 0.5 x 250, but no rise and night == day
+    hourly_stats, meter_stats = analyze_hourly_patterns(synthetic_fleet(n_meters=0))
+
+    flat = [m for m in rank_anomalous_meters(hourly_stats, meter_stats) if m['meter_id'] == 'FLAT']
+    expected = [m for m in reference_anomalous_meters(hourly_stats, meter_stats) if m['meter_id'] == 'FLAT']
+
+    assert [m['anomaly_score'] for m in flat] == [m['anomaly_score'] for m in expected] == [5]
+    assert [m['reasons'] for m in flat] == [m['reasons'] for m in expected]
+
+
+def test_matrix_report_matches_reading_path(tmp_path, monkeypatch):
+    # One reading per 30-minute slot, with gaps, so slot means are the readings
+    rng = np.random.default_rng(0)
+    times = pd.date_range('2022-06-01', periods=48 * 10, freq='30min')
+    frames = []
+    for m in range(5):
+        keep = rng.random(len(times)) > 0.2
+        frames.append(pd.DataFrame({METER_COL: f'M{m}', 'Entry Datetime': times[keep], TIME_COL: times[keep],
+                                    POWER_COL: rng.uniform(0, 1000, keep.sum()).round(1)}))
+    monkeypatch.chdir(tmp_path)
+    write_meter_store(pd.concat(frames, ignore_index=True))
+
+    matrix_hourly, matrix_meters, matrix_flagged = analyze_matrix(rows_per_shard=2)
+    hourly, meters, flagged = analyze_sharded(workers=1)
+
+    assert list(matrix_hourly.columns) == list(hourly.columns)
+    assert list(matrix_meters.columns) == list(meters.columns)
+    pd.testing.assert_frame_equal(matrix_hourly, hourly, check_dtype=False, check_categorical=False, rtol=1e-6)
+    pd.testing.assert_frame_equal(matrix_meters, meters, check_dtype=False, check_categorical=False, rtol=1e-6)
+    assert [m['meter_id'] for m in matrix_flagged] == [m['meter_id'] for m in flagged]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from day_index import build_day_index, load_day_index
+from meter_store import METER_COL, TIME_COL, iter_meter_frames, load_meter_data, write_meter_store
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+
+
+def _store(tmp_path):
+    times = pd.date_range('2022-06-01', periods=48 * 3, freq='30min')
+    df = pd.DataFrame({METER_COL: 'M1', 'Entry Datetime': times, TIME_COL: times,
+                       POWER_COL: np.arange(len(times), dtype=float)})
+    store_dir = str(tmp_path / 'store')
+    write_meter_store(df, store_dir)
+    build_day_index(store_dir)
+    return store_dir
+
+
+def test_load_day_reads_only_that_day(tmp_path):
+    day = load_day_index(_store(tmp_path)).load_day('M1', '2022-06-02')
+
+    assert len(day) == 48
+    assert (day[TIME_COL].dt.normalize() == pd.Timestamp('2022-06-02')).all()
+    assert isinstance(day[METER_COL].dtype, pd.CategoricalDtype)
+    assert day[POWER_COL].dtype == np.float32
+
+
+def test_day_without_data_is_an_empty_typed_frame(tmp_path):
+    index = load_day_index(_store(tmp_path))
+
+    for meter_id, date in [('M1', '2030-06-02'), ('UNKNOWN', '2022-06-02')]:
+        day = index.load_day(meter_id, date, columns=[POWER_COL])
+
+        assert len(day) == 0
+        assert pd.api.types.is_datetime64_any_dtype(day[TIME_COL])
+        assert isinstance(day[METER_COL].dtype, pd.CategoricalDtype)
+        assert day[POWER_COL].dtype == np.float32
+        assert len(day[TIME_COL].dt.hour) == 0
+
+
+def test_store_readers_return_compact_dtypes(tmp_path):
+    store_dir = _store(tmp_path)
+
+    frames = [load_meter_data(['M1'], '2022-06-02', '2022-06-03', store_dir=store_dir),
+              load_meter_data(['UNKNOWN'], store_dir=store_dir)]
+    frames += [readings for _, readings in iter_meter_frames(store_dir=store_dir)]
+
+    for df in frames:
+        assert isinstance(df[METER_COL].dtype, pd.CategoricalDtype)
+        assert df[POWER_COL].dtype == np.float32
+    assert frames[0][POWER_COL].tolist() == list(range(48, 96))
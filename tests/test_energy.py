@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from energy import POLICIES, POWER_COL, hourly_energy, interval_energy
+from meter_store import METER_COL, TIME_COL
+from window_peaks import window_hours, window_totals
+
+
+def _readings(power, start='2022-06-01', meter='M1'):
+    times = pd.date_range(start, periods=len(power), freq='30min')
+    return pd.DataFrame({METER_COL: meter, TIME_COL: times, POWER_COL: np.asarray(power, dtype=float)})
+
+
+def _drop(df, start, end):
+    return df[(df[TIME_COL] < start) | (df[TIME_COL] > end)]
+
+
+def _fleet(seed=0):
+    # Noisy meters with gaps of every length, some past MAX_FILL, and a few missing power values
+    rng = np.random.default_rng(seed)
+    frames = []
+    for m in range(6):
+        df = _readings(rng.uniform(0, 2000, 48 * 5), meter=f'M{m}')
+        df = df[rng.random(len(df)) > 0.15]
+        df = _drop(df, df[TIME_COL].iloc[40], df[TIME_COL].iloc[40] + pd.Timedelta(minutes=30 * m))
+        df.loc[df.sample(3, random_state=m).index, POWER_COL] = np.nan
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+def test_steady_window_across_unfilled_gap(policy):
+    # 1000 W with 04:00-05:30 missing: the gap after 03:30 must not spill into the 0-4 window
+    df = _drop(_readings([1000.0] * 96), '2022-06-01 04:00', '2022-06-01 05:30')
+
+    totals = window_totals(df, 0, 4, policy)
+
+    assert totals.loc[('M1', pd.Timestamp('2022-06-01')), 'energy_kwh'] == pytest.approx(4.0)
+    assert totals.loc[('M1', pd.Timestamp('2022-06-01')), 'coverage'] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize('policy', ['hold', 'linear'])
+def test_filled_gap_is_split_between_hours(policy):
+    df = _drop(_readings([1000.0] * 48), '2022-06-01 04:00', '2022-06-01 05:00')
+
+    hours = hourly_energy(df, policy).set_index(TIME_COL)
+
+    assert hours.loc['2022-06-01 03:00', 'energy_wh'] == pytest.approx(1000.0)
+    assert hours.loc['2022-06-01 04:00', 'energy_wh'] == pytest.approx(1000.0)
+    assert hours.loc['2022-06-01 05:00', 'energy_wh'] == pytest.approx(1000.0)
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+@pytest.mark.parametrize('start_hour, end_hour', [(0, 4), (21, 4), (5, 9), (18, 18)])
+def test_window_energy_bounded_by_peak_power(policy, start_hour, end_hour):
+    df = _fleet()
+    p_max = df.groupby(METER_COL)[POWER_COL].max()
+
+    totals = window_totals(df, start_hour, end_hour, policy)
+    length = len(window_hours(start_hour, end_hour))
+
+    bound = p_max.reindex(totals.index.get_level_values(METER_COL)).to_numpy() * length / 1000
+    assert (totals['energy_kwh'].to_numpy() <= bound + 1e-9).all()
+    assert (totals['coverage'] <= 1.0 + 1e-12).all()
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+def test_hourly_split_keeps_total_energy(policy):
+    df = _fleet(1)
+
+    hours = hourly_energy(df, policy)
+    intervals = interval_energy(df, policy)
+
+    assert hours['energy_wh'].sum() == pytest.approx(intervals['energy_wh'].sum())
+    assert hours['covered_h'].sum() == pytest.approx(intervals['covered_h'].sum())
+    assert (hours['covered_h'] <= 1.0 + 1e-12).all()
+
+
+def test_window_totals_skip_unobserved_categorical_meters():
+    # read_readings_csv returns categorical meter ids; filtering leaves unused categories behind
+    df = pd.concat([_readings([1000.0] * 96, meter=meter) for meter in ['M1', 'M2', 'M3']], ignore_index=True)
+    df[METER_COL] = df[METER_COL].astype('category')
+    df = df[df[METER_COL] == 'M2']
+
+    totals = window_totals(df, 21, 4)
+
+    assert list(totals.index.get_level_values(METER_COL).unique()) == ['M2']
+    assert len(totals) == 3
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from hes_datetime import _parse_slow, parse_hes_datetimes, parse_unique_values
+
+
+def test_fixed_width_matches_slow_path():
+    values = np.array(['May 30, 2022, 00:30:00:000000', 'Dec 31, 2021, 23:59:59:123456',
+                       'Feb 29, 2024, 12:00:00:000001', 'Feb 29, 2023, 12:00:00:000000',
+                       'Foo 01, 2022, 00:00:00:000000', 'Jun 31, 2022, 00:00:00:000000'], dtype=object)
+
+    parsed = parse_unique_values(values)
+
+    np.testing.assert_array_equal(parsed, _parse_slow(values))
+    assert parsed[0] == np.datetime64('2022-05-30T00:30:00')
+    assert np.isnat(parsed[3:]).all()
+
+
+def test_microsecond_dot_separator_takes_the_slow_path():
+    values = np.array(['May 30, 2022, 00:30:00.000000', 'May 30, 2022, 00:30:00.250000'], dtype=object)
+
+    parsed = parse_unique_values(values)
+
+    assert parsed[0] == np.datetime64('2022-05-30T00:30:00')
+    assert parsed[1] == np.datetime64('2022-05-30T00:30:00.250')
+
+
+def test_parse_columns_rejects_only_bad_rows():
+    entry = ['May 30, 2022, 00:30:00:000000', 'May 30, 2022, 01:00:00.000000', 'not a date', None]
+    meter = ['May 30, 2022, 00:30:00:000000', 'May 30, 2022, 01:00:00:000000', 'May 30, 2022, 01:30:00:000000',
+             'May 30, 2022, 02:00:00:000000']
+
+    (entry_times, meter_times), rejected = parse_hes_datetimes(entry, meter)
+
+    assert rejected.tolist() == [False, False, True, True]
+    assert entry_times[1] == meter_times[1] == pd.Timestamp('2022-05-30 01:00').to_datetime64()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from hourly_sketch import RELATIVE_ACCURACY, HourlyStatsSketch
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+
+
+def _readings(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'HES Meter Id': rng.choice(['M1', 'M2', 'M3'], n), 'Hour': rng.integers(0, 24, n),
+                       POWER_COL: rng.lognormal(5, 1, n)})
+    df.loc[rng.random(n) < 0.1, POWER_COL] = np.nan
+    return df
+
+
+def _sketch(df):
+    return HourlyStatsSketch.from_readings(df['HES Meter Id'], df['Hour'], df[POWER_COL])
+
+
+def _lower_median(values):
+    values = np.sort(values.dropna().to_numpy())
+    return values[(len(values) - 1) // 2] if len(values) else np.nan
+
+
+@pytest.fixture
+def files():
+    first, second = _readings(4000, 0), _readings(3000, 1)
+    # A (meter, hour) whose readings are all missing
+    second = pd.concat([second, pd.DataFrame({'HES Meter Id': ['M4'] * 3, 'Hour': [5] * 3, POWER_COL: np.nan})],
+                       ignore_index=True)
+    return first, second
+
+
+def test_merged_sketches_match_single_pass(files):
+    combined = pd.concat(files, ignore_index=True)
+
+    merged = _sketch(files[0]).merge(_sketch(files[1])).hourly_stats().set_index(['HES Meter Id', 'Hour'])
+    single = _sketch(combined).hourly_stats().set_index(['HES Meter Id', 'Hour'])
+    exact = combined.groupby(['HES Meter Id', 'Hour'])[POWER_COL].agg(['mean', 'max', 'min', 'std', 'count'])
+
+    merged = merged.sort_index()
+    pd.testing.assert_frame_equal(merged, single.sort_index(), check_exact=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(merged[['mean', 'max', 'min', 'std', 'count']], exact.reindex(merged.index),
+                                  check_exact=False, rtol=1e-9)
+
+
+def test_median_within_relative_accuracy_and_ignores_missing(files):
+    combined = pd.concat(files, ignore_index=True)
+
+    merged = _sketch(files[0]).merge(_sketch(files[1]))
+    hourly = merged.hourly_stats().set_index(['HES Meter Id', 'Hour'])['median']
+    expected = combined.groupby(['HES Meter Id', 'Hour'])[POWER_COL].apply(_lower_median)
+
+    assert np.isnan(hourly[('M4', 5)])
+    hourly, expected = hourly.drop(('M4', 5)), expected.drop(('M4', 5)).reindex(hourly.drop(('M4', 5)).index)
+    np.testing.assert_allclose(hourly, expected, rtol=RELATIVE_ACCURACY)
+
+    meters = merged.meter_stats().set_index('HES Meter Id')['median'].drop('M4')
+    expected = combined.groupby('HES Meter Id')[POWER_COL].apply(_lower_median).reindex(meters.index)
+    np.testing.assert_allclose(meters, expected, rtol=RELATIVE_ACCURACY)
@@ -0,0 +1,167 @@
+import argparse
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from meter_store import METER_COL, TIME_COL, load_meter_data
+from compact_readings import read_readings_csv
+from energy import MIN_COVERAGE, POLICIES, hourly_energy, energy_totals
+
+POWER_COL = 'Import active power (QI+QIV)[W]'
+
+HOUR = np.timedelta64(1, 'h')
+
+
+def window_hours(start_hour, end_hour):
+    """Clock hours of the window [start_hour, end_hour), wrapping past midnight when end_hour <= start_hour"""
+
+    return [(start_hour + i) % 24 for i in range((end_hour - start_hour - 1) % 24 + 1)]
+
+
+def window_totals(df, start_hour, end_hour, policy='linear'):
+    """Energy of the readings inside the hour window, per meter and window date.
+
+    A window wrapping past midnight (e.g. 21 -> 4) is counted towards the
+    date it starts on: timestamps are shifted back by start_hour, so every
+    window becomes the first hours of one shifted day. Readings are
+    integrated over their actual intervals and split at hour boundaries by
+    energy.hourly_energy. Returns a DataFrame indexed by (HES Meter Id, date)
+    with energy_kwh and coverage, the share of the window's hours backed by
+    readings.
+    """
+
+    length = len(window_hours(start_hour, end_hour))
+    energy = hourly_energy(df, policy)
+    shifted = energy[TIME_COL].to_numpy(dtype='datetime64[ns]') - start_hour * HOUR
+    days = shifted.astype('datetime64[D]')
+    in_window = (shifted - days) < length * HOUR
+
+    windows = energy.loc[in_window, [METER_COL, 'energy_wh', 'covered_h']]
+    windows['date'] = days[in_window]
+    return energy_totals(windows, [METER_COL, 'date'], length)
+
+
+def top_window_days(totals, top_k=5, min_coverage=MIN_COVERAGE):
+    """The top_k windows by energy of each meter, highest first, with their rank.
+    Windows covering less than min_coverage of their hours are left out."""
+
+    top = totals[totals['coverage'] >= min_coverage].reset_index()
+    top = top.sort_values([METER_COL, 'energy_kwh', 'date'], ascending=[True, False, True], kind='stable')
+    top = top.groupby(METER_COL, sort=False, observed=True).head(top_k)
+    top['rank'] = top.groupby(METER_COL, sort=False, observed=True).cumcount() + 1
+    return top.reset_index(drop=True)
+
+
+def load_window_readings(csv_filename=None, meter_ids=None, start=None, end=None):
+    """Readings of the meters (all when None) from a CSV or the store, power column only"""
+
+    if csv_filename is None:
+        return load_meter_data(meter_ids, start, end, columns=[POWER_COL])
+
+    df = read_readings_csv(csv_filename, [METER_COL, TIME_COL, POWER_COL], add_day_hour=False)
+    if meter_ids is not None:
+        df = df[df[METER_COL].isin(meter_ids)]
+    if start is not None:
+        df = df[df[TIME_COL] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df[TIME_COL] < pd.Timestamp(end)]
+    return df
+
+
+def window_peaks(start_hour, end_hour, top_k=5, csv_filename=None, meter_ids=None, start=None, end=None,
+                 policy='linear', min_coverage=MIN_COVERAGE):
+    """Top window days of every meter with one read and one groupby over all of them"""
+
+    df = load_window_readings(csv_filename, meter_ids, start, end)
+    return top_window_days(window_totals(df, start_hour, end_hour, policy), top_k, min_coverage)
+
+
+def _clock(hour):
+    return f'{hour % 12 or 12} {"AM" if hour % 24 < 12 else "PM"}'
+
+
+def window_label(start_hour, end_hour):
+    """e.g. '9 PM - 4 AM'"""
+
+    return f'{_clock(start_hour)} - {_clock(end_hour)}'
+
+
+def plot_peak_day(full_day_data, hours, target_date, name, color, box_color, label, filename):
+    """Chart one day's readings with the window hours highlighted, as the night/morning scripts save it"""
+
+    hour_col = full_day_data[TIME_COL].dt.hour
+    window_data = full_day_data[hour_col.isin(hours)]
+
+    plt.figure(figsize=(12, 8))
+    plt.plot(hour_col, full_day_data[POWER_COL], marker='o', linewidth=3, markersize=6, color='blue')
+    plt.plot(window_data[TIME_COL].dt.hour, window_data[POWER_COL],
+             marker='o', linewidth=4, markersize=8, color=color, label=f'{name} Hours ({label})')
+
+    plt.title(f'Mosque Power Consumption - {target_date}\n(Highest {name} Consumption Day)',
+              fontsize=16, fontweight='bold')
+    plt.xlabel('Hour of Day', fontsize=14)
+    plt.ylabel('Power Consumption (W)', fontsize=14)
+    plt.grid(True, alpha=0.3)
+    plt.legend(fontsize=12)
+
+    # Set x-axis to show all hours
+    plt.xticks(range(0, 24, 2))
+    plt.xlim(-0.5, 23.5)
+
+    window_power = window_data[POWER_COL]
+    stats_text = (f'{name} Hours Stats:\nAvg: {window_power.mean():.1f}W\n'
+                  f'Max: {window_power.max():.1f}W\nMin: {window_power.min():.1f}W')
+    plt.text(0.02, 0.98, stats_text, transform=plt.gca().transAxes,
+             verticalalignment='top', bbox=dict(boxstyle='round', facecolor=box_color, alpha=0.8))
+
+    plt.tight_layout()
+    plt.savefig(filename, dpi=300, bbox_inches='tight')
+    plt.show()
+
+
+def print_peak_day(full_day_data, hours, target_date, name):
+    """Hour-by-hour listing of one day with the window hours marked, and a window summary"""
+
+    print(f"\nDetailed Analysis for {target_date}:")
+    print("=" * 50)
+    for timestamp, power in zip(full_day_data[TIME_COL], full_day_data[POWER_COL]):
+        marker = f"  *** {name.upper()} HOUR ***" if timestamp.hour in hours else ""
+        print(f"Hour {timestamp.hour:2d}: {power:6.1f}W{marker}")
+
+    window_data = full_day_data[full_day_data[TIME_COL].dt.hour.isin(hours)]
+    window_power = window_data[POWER_COL]
+    energy = hourly_energy(full_day_data)
+    window_kwh = energy.loc[energy[TIME_COL].dt.hour.isin(hours), 'energy_wh'].sum() / 1000
+
+    print(f"\n{name} consumption summary:")
+    print(f"Total {name.lower()} consumption: {window_kwh:.2f} kWh")
+    print(f"Average {name.lower()} consumption: {window_power.mean():.1f}W")
+    print(f"Peak {name.lower()} consumption: {window_power.max():.1f}W "
+          f"at hour {window_data.loc[window_power.idxmax(), TIME_COL].hour}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Top days by consumption inside an hour window, for every meter')
+    parser.add_argument('start_hour', type=int, help='First hour of the window (0-23)')
+    parser.add_argument('end_hour', type=int, help='Hour the window ends at, exclusive; '
+                                                   'at or before start_hour wraps past midnight')
+    parser.add_argument('--top', type=int, default=5, help='Days per meter')
+    parser.add_argument('--csv', help='Read this CSV instead of the store')
+    parser.add_argument('--meters', nargs='*', help='Only these meters (default: all)')
+    parser.add_argument('--start', help='First date to include')
+    parser.add_argument('--end', help='Last date to include (inclusive)')
+    parser.add_argument('--policy', choices=POLICIES, default='linear', help='How gaps between readings are counted')
+    parser.add_argument('--min-coverage', type=float, default=MIN_COVERAGE,
+                        help='Leave out windows with less of their hours covered by readings')
+    parser.add_argument('--output', help='Write the ranking to this CSV')
+    args = parser.parse_args()
+
+    end = pd.Timestamp(args.end) + pd.Timedelta(days=1) if args.end else None
+    peaks = window_peaks(args.start_hour, args.end_hour, args.top, args.csv, args.meters, args.start, end,
+                         args.policy, args.min_coverage)
+
+    print(f"Top {args.top} days per meter by energy for {window_label(args.start_hour, args.end_hour)} "
+          f"({peaks[METER_COL].nunique()} meters)")
+    print(peaks.to_string(index=False))
+    if args.output:
+        peaks.to_csv(args.output, index=False)
+        print(f"Saved ranking to {args.output}")